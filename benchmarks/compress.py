@@ -0,0 +1,86 @@
+"""
+Compare compressing files by running gzip through the shell for every file,
+the way the gzip tool does, with the in-process compress tool.
+
+Usage: python benchmarks/compress.py [number of files] [file size]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+#-
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# pylint:disable=wrong-import-position
+from pybuildtool.tools.compress import compress_file
+
+WORDS = ('function', 'return', 'var', 'this', 'prototype', 'window',
+        'document', 'element', 'length', 'null', 'undefined', '{', '}', '(',
+        ')', ';', '=', '+', 'if', 'else')
+
+
+def generate_files(dirname, count, size):
+    rand = random.Random(0)
+    files = []
+    for index in range(count):
+        filename = os.path.join(dirname, 'file%i.js' % index)
+        words = []
+        length = 0
+        while length < size:
+            word = rand.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        with open(filename, 'w') as f:
+            f.write(' '.join(words))
+        files.append(filename)
+    return files
+
+
+def shell_gzip(files, out_dir):
+    executable = shutil.which('gzip')
+    for filename in files:
+        out = os.path.join(out_dir, os.path.basename(filename) + '.gz')
+        subprocess.check_call('{exe} {arg} {in_} > {out}'.format(
+                exe=executable, arg='--stdout --best', in_=filename, out=out),
+                shell=True)
+
+
+def thread_pool_gzip(files, out_dir):
+    def run(filename):
+        out = os.path.join(out_dir, os.path.basename(filename) + '.gz')
+        return compress_file(filename, out, 'gzip', 9)
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        list(executor.map(run, files))
+
+
+def measure(func, files, out_dir):
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    start = perf_counter()
+    func(files, out_dir)
+    return perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = os.path.join(tmp, 'src')
+        os.makedirs(src_dir)
+        files = generate_files(src_dir, count, size)
+        print('%i files, %i bytes each' % (count, size))
+
+        out_dir = os.path.join(tmp, 'out')
+        slow = measure(shell_gzip, files, out_dir)
+        fast = measure(thread_pool_gzip, files, out_dir)
+        print('shell gzip:       %.3fs' % slow)
+        print('compress (%i threads): %.3fs' % (os.cpu_count(), fast))
+        print('speedup: %.1fx' % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()
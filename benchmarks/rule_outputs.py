@@ -0,0 +1,100 @@
+"""
+Measure output mapping of a rule writing every input into a directory, the
+way `@group` references in build.yml read `Rule.files` once per consumer.
+
+Usage: python benchmarks/rule_outputs.py [number of files] [consumers]
+"""
+import os
+import re
+import sys
+from time import perf_counter
+from types import SimpleNamespace
+#-
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# pylint:disable=wrong-import-position
+from pybuildtool.core.rule import Rule
+from pybuildtool.misc.path import expand_resource
+
+
+def make_node(path):
+    return SimpleNamespace(abspath=lambda: path.rstrip('/'))
+
+
+def make_group(top_dir):
+    root = SimpleNamespace(find_dir=lambda x: make_node('/' + x))
+    bld = SimpleNamespace(variant_dir=os.path.join(top_dir, '.BUILD'),
+            path=make_node(top_dir), root=root,
+            add_pre_fun=lambda func: None)
+    return SimpleNamespace(context=bld, resources={},
+            get_name=lambda: 'assets/images/pngcrush',
+            get_patterns=lambda: {'_1': 'assets', '_2': 'images'})
+
+
+def make_rule(files):
+    conf = {
+        '_replace_patterns_': [[r'\.jpeg$', '.jpg'], [r'-orig\.', '.']],
+        '_source_basedir_': '/src/assets/',
+    }
+    return Rule(make_group('/src'), conf, list(files), ['.BUILD/images/'],
+            [], [])
+
+
+def legacy_files(rule):
+    """`Rule.files` as it was computed before the mapping was cached."""
+    result = []
+    for fo in rule.file_out:
+        for fi in rule.file_in:
+            fofi = fi
+            for (pat, rep) in rule.conf['_replace_patterns_']:
+                fofi = re.sub(pat, rep, fofi)
+            basedir = rule.conf.get('_source_basedir_', False)
+            if basedir:
+                basedir = expand_resource(rule.group, basedir)
+            if basedir and fofi.startswith(basedir):
+                fofi = fofi[len(basedir):].strip('/')
+            else:
+                fofi = os.path.basename(fofi)
+            result.append(os.path.join(fo, fofi))
+    return result
+
+
+def measure(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    consumers = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    files = ['/src/assets/images/dir%i/photo%i-orig.jpeg' % (i % 100, i)
+            for i in range(count)]
+    print('%i input files, %i consumers' % (count, consumers))
+
+    rule = make_rule(files)
+    assert list(rule.files) == legacy_files(rule)
+
+    def run_legacy():
+        rule = make_rule(files)
+        for _ in range(consumers):
+            legacy_files(rule)
+
+    def run_cached():
+        rule = make_rule(files)
+        for _ in range(consumers):
+            rule.files # pylint:disable=pointless-statement
+
+    slow = measure(run_legacy)
+    fast = measure(run_cached)
+    print('recomputed: %.3fs' % slow)
+    print('cached:     %.3fs' % fast)
+    print('speedup: %.1fx' % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()
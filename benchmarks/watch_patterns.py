@@ -0,0 +1,112 @@
+"""
+Measure matching of file events against the patterns watched by `waf watch`,
+the per-pattern walk of the old handler against the compiled matcher.
+
+The events are replayed from a file with a path per line, for example
+recorded with `inotifywait -m -r --format %w%f src`, or generated: sources
+being saved together with the swap and backup files of editors.
+
+Usage: python benchmarks/watch_patterns.py [number of patterns] [event log]
+"""
+import os
+import random
+import sys
+from time import perf_counter
+#-
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+# pylint:disable=wrong-import-position
+from pybuildtool.misc.file_index import compile_pattern, filter_reduce
+from pybuildtool.misc.pattern_matcher import PatternMatcher
+
+
+def generate_patterns(count):
+    """Patterns of `raw_file_in` the way build.yml lists them."""
+    result = []
+    for i in range(count):
+        kind = i % 4
+        project = '/src/project%i' % (i // 40)
+        if kind == 0:
+            result.append('%s/assets/js/module%i.js' % (project, i))
+        elif kind == 1:
+            result.append('%s/assets/css%i/*.less' % (project, i))
+        elif kind == 2:
+            result.append('%s/templates%i/**/*.html' % (project, i))
+        else:
+            result.append('%s/images%i/' % (project, i))
+    return result
+
+
+def generate_events(patterns, count):
+    random.seed(0)
+    sources = []
+    for pattern in patterns:
+        path = pattern.replace('**/', 'sub/').replace('*', 'name')
+        if path.endswith('/'):
+            path += 'photo.png'
+        sources.append(path)
+
+    result = []
+    for _ in range(count):
+        path = random.choice(sources)
+        dirname, filename = os.path.split(path)
+        # a vim save: swap files, backup, then the file itself
+        result.extend([
+            os.path.join(dirname, '.%s.swp' % filename),
+            os.path.join(dirname, '4913'),
+            path + '~',
+            path,
+        ])
+    return result
+
+
+def load_events(filename):
+    with open(filename) as f:
+        return [x.rstrip('\n') for x in f if x.strip()]
+
+
+def legacy_match(path, patterns):
+    """`FileChangeHandler` as it walked every pattern for every event."""
+    filters = patterns
+    for name in path.split(os.path.sep):
+        filters = filter_reduce(name, filters)
+    return () in filters
+
+
+def measure(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    patterns = generate_patterns(count)
+    if len(sys.argv) > 2:
+        events = load_events(sys.argv[2])
+    else:
+        events = generate_events(patterns, 500)
+    print('%i patterns, %i events' % (len(patterns), len(events)))
+
+    compiled = [compile_pattern(x) for x in patterns]
+    matcher = PatternMatcher(patterns)
+    legacy = [legacy_match(x, compiled) for x in events]
+    assert legacy == [matcher.match(x) for x in events]
+    print('%i events matched' % sum(legacy))
+
+    slow = measure(lambda: [legacy_match(x, compiled) for x in events])
+    fast = measure(lambda: [matcher.match(x) for x in events])
+    start = perf_counter()
+    PatternMatcher(patterns)
+    print('compile: %.3fs' % (perf_counter() - start))
+    print('per pattern: %.3fs' % slow)
+    print('compiled:    %.3fs' % fast)
+    print('speedup: %.1fx' % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare build.yml loading time of the pure python loader with the libyaml
+based loader.
+
+Usage: python benchmarks/yaml_loader.py [number of lines]
+"""
+import os
+import sys
+from time import perf_counter
+import yaml
+#-
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from pybuildtool.misc.yaml_utils import OrderedDictSafeLoader,\
+        OrderedDictYAMLLoader # pylint:disable=wrong-import-position
+
+
+def generate_build_yml(lines):
+    """Generate build.yml with roughly the given number of lines."""
+    result = [
+        'EXCLUDES: &EXCLUDES',
+        '  - "{_1}/{_2}/js/vendor.js"',
+        '  - "{_1}/{_2}/js/require.js"',
+        'LINT: &LINT',
+        '  options:',
+        '    _source_excluded_: *EXCLUDES',
+        '    config_file: etc/jshint.rc',
+        '',
+    ]
+    project = 0
+    while len(result) < lines:
+        project += 1
+        result.append('project%i:' % project)
+        result.append('  options:')
+        result.append('    pylint_config_file: etc/pylint.rc')
+        for app in range(20):
+            result.extend([
+                '  app%i:' % app,
+                '    jshint:',
+                '      <<: *LINT',
+                '      file_in: "{_1}/{_2}/js/**/*.js"',
+                '    concat:',
+                '      raw_file_in: "{_1}/{_2}/js/**/*.js"',
+                '      rule_in: "{_1}/{_2}/jshint"',
+                '      file_out: "js/{_1}-{_2}.js"',
+                '    pylint:',
+                '      raw_file_in:',
+                '        - "{_1}/{_2}/*.py"',
+                '        - "{_1}/{_2}/**/*.py"',
+                '      raw_depend_in: etc/pylint.rc',
+            ])
+    return '\n'.join(result) + '\n'
+
+
+def measure(source, loader, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        yaml.load(source, Loader=loader)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    source = generate_build_yml(lines)
+    print('build.yml: %i lines, %i bytes' % (source.count('\n'), len(source)))
+
+    assert yaml.load(source, Loader=OrderedDictYAMLLoader) ==\
+            yaml.load(source, Loader=OrderedDictSafeLoader)
+
+    slow = measure(source, OrderedDictYAMLLoader)
+    fast = measure(source, OrderedDictSafeLoader)
+    print('OrderedDictYAMLLoader: %.3fs' % slow)
+    print('OrderedDictSafeLoader: %.3fs (%s)' % (fast,
+            OrderedDictSafeLoader.__mro__[1].__name__))
+    print('speedup: %.1fx' % (slow / fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,12 +2,39 @@
 Watch files for changes and run build
 
 add option `browser-notifier`, see the tool `browser_reload_notifier`
+
+`--watch-backend` chooses how the files are observed: `native` events of the
+platform, `polling`, or `auto` (the default) to poll when the native events
+are not available.
+
+The build starts when the files stopped changing for `--watch-debounce`
+milliseconds (150), or `--watch-max-wait` milliseconds (2000) after the
+first change if they keep changing.  Changes made while building are built
+once afterward.
+
+Only the groups whose sources changed, and the groups using them with
+`rule_in` or `@group` inputs, are built with `--targets`.  `--watch-all`
+builds everything instead.
 '''
 import signal
 from waflib import Context # pylint:disable=import-error
 
 from .application import Application
-from .file_observer import FileObserver
+from .file_observer import BACKENDS, FileObserver
+
+
+def options(opt):
+    opt.add_option('--watch-backend', dest='watch_backend', default='auto',
+            choices=BACKENDS,
+            help='how files are observed by watch: %s' % ', '.join(BACKENDS))
+    opt.add_option('--watch-debounce', dest='watch_debounce', default=150,
+            type='int', help='milliseconds without changes before building')
+    opt.add_option('--watch-max-wait', dest='watch_max_wait', default=2000,
+            type='int',
+            help='milliseconds after a change before building anyway')
+    opt.add_option('--watch-all', dest='watch_all', default=False,
+            action='store_true',
+            help='build everything instead of the changed groups')
 
 
 def watch(bld):
@@ -1,21 +1,44 @@
 import os
-from pybuildtool.misc.resource import get_source_files
+from pybuildtool.misc.resource import get_source_rules
+from pybuildtool.misc.yaml_utils import OrderedDictSafeLoader
 from subprocess import call
 import sys
-from time import sleep
+import threading
+from time import monotonic
 import yaml
+from waflib import Options # pylint:disable=import-error
 
 from .file_observer import FileObserver
 
 class Application(object):
 
     bld = None
+    condition = None
     observer = None
 
     rebuild = True
     reload = True
     running = True
 
+    # groups whose sources changed since the last build
+    changed_groups = None
+    # group -> groups using its outputs
+    dependents = None
+    # build only the changed groups and their dependents
+    targeted = True
+    # the last build failed, build everything again
+    failed = False
+
+    # seconds without changes before building
+    debounce = None
+    # seconds after the first change when the build starts anyway
+    max_wait = None
+    # monotonic time of the first and the last changes not built yet
+    first_change = None
+    last_change = None
+    # seconds between health checks of the observer
+    check_interval = 1
+
     config_file = None
     sysargs = None
 
@@ -40,41 +63,125 @@ class Application(object):
                         'build', 1)
                 break
 
-        self.observer = FileObserver(self)
+        self.condition = threading.Condition()
+        self.changed_groups = set()
+        self.dependents = {}
+        self.targeted = not getattr(Options.options, 'watch_all', False) and\
+                not any(x.startswith('--targets') for x in self.sysargs)
+        self.debounce = getattr(Options.options, 'watch_debounce', 150) / 1000
+        self.max_wait = getattr(Options.options, 'watch_max_wait', 2000) / 1000
+        self.observer = FileObserver(self, getattr(Options.options,
+                'watch_backend', 'auto'))
 
 
     def run(self):
+        reload, rebuild, groups = self.take_changes()
         while self.running:
-            if self.reload:
+            if reload:
                 self.do_reload()
+                rebuild = True
+                groups = None
 
-            if self.rebuild:
-                self.rebuild = False
-                # On windows we'd be using waf.bat
-                use_shell = os.name == 'nt'
-                call(self.sysargs, shell=use_shell)
+            if rebuild:
+                self.build(groups)
 
-            count = 0
-            while count < 10 and self.running:
-                count += 1
-                sleep(1)
+            reload, rebuild, groups = self.wait_changes()
 
         print('Closing files observers..')
         self.observer.close()
 
 
+    def build(self, groups=None):
+        """Run the build, of the changed groups and their dependents if
+        given."""
+        args = list(self.sysargs)
+        if groups and self.targeted and not self.failed:
+            args.append('--targets=' + ','.join(sorted(
+                    self.get_targets(groups))))
+
+        # On windows we'd be using waf.bat
+        use_shell = os.name == 'nt'
+        self.failed = call(args, shell=use_shell) != 0
+
+
+    def get_targets(self, groups):
+        """The groups and the groups depending on them."""
+        result = set(groups)
+        pending = list(groups)
+        while pending:
+            for group in self.dependents.get(pending.pop(), ()):
+                if group not in result:
+                    result.add(group)
+                    pending.append(group)
+        return result
+
+
+    def notify(self, reload=False, groups=()):
+        """Record a change, called by the observer threads."""
+        with self.condition:
+            if reload:
+                self.reload = True
+            else:
+                self.rebuild = True
+                self.changed_groups.update(groups)
+            self.last_change = monotonic()
+            if self.first_change is None:
+                self.first_change = self.last_change
+            self.condition.notify()
+
+
+    def take_changes(self):
+        with self.condition:
+            result = self.reload, self.rebuild, self.changed_groups
+            self.reload = self.rebuild = False
+            self.changed_groups = set()
+            self.first_change = self.last_change = None
+            return result
+
+
+    def wait_changes(self):
+        """Wait until the changes stopped for `debounce` seconds, or went on
+        for `max_wait` seconds.
+
+        The changes made while building are collapsed into one build.
+        Returns (reload, rebuild, changed groups).
+        """
+        while self.running:
+            self.observer.check()
+            with self.condition:
+                if self.first_change is None:
+                    self.condition.wait(self.check_interval)
+                    continue
+
+                deadline = min(self.last_change + self.debounce,
+                        self.first_change + self.max_wait)
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return self.take_changes()
+                self.condition.wait(min(remaining, self.check_interval))
+        return False, False, set()
+
+
     def do_reload(self):
-        self.reload = False
         self.observer.close()
 
         with open(self.config_file, 'r') as f:
-            config = yaml.load(f, Loader=yaml.SafeLoader)
+            config = yaml.load(f, Loader=OrderedDictSafeLoader)
 
-        self.observer.open(list(os.path.realpath(f) for f in\
-                get_source_files(config, self.bld)))
+        files = []
+        groups = []
+        self.dependents = {}
+        for name, rule_files, rules_in in get_source_rules(config, self.bld):
+            for f in rule_files:
+                files.append(os.path.realpath(f))
+                groups.append(name)
+            for rule_in in rules_in:
+                self.dependents.setdefault(rule_in, set()).add(name)
 
-        self.rebuild = True
+        self.observer.open(files, groups)
 
 
     def stop(self, *args):
-        self.running = False
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
@@ -1,27 +1,40 @@
 """ Implements watchdog.
+
+The observer uses the native events of the platform (inotify on Linux), or
+polls the directories if they're not available, for example when the
+limit of inotify watches was reached.
+
+Only the directories which the file patterns can match are watched: the
+directory of a pattern without wildcards in its directory part, or
+recursively the directory before the first wildcard.  Directories covered
+by a recursive watch of a parent are not watched again.
 """
 import os
-import re
+from pybuildtool.misc.pattern_matcher import PatternMatcher
 from watchdog.events import FileOpenedEvent, FileSystemEventHandler
+from watchdog.observers import Observer as NativeObserver
 from watchdog.observers.polling import PollingObserver
 
+# values of `--watch-backend`
+BACKENDS = ('auto', 'native', 'polling')
+
 class FileChangeHandler(FileSystemEventHandler):
 
     app = None
-    file_patterns = None
+    matcher = None
 
     def __init__(self, app):
         super(FileChangeHandler, self).__init__()
         self.app = app
-        self.file_patterns = []
+        self.matcher = PatternMatcher()
 
 
     def app_reload(self):
-        self.app.reload = True
+        self.app.notify(reload=True)
 
 
-    def app_rebuild(self):
-        self.app.rebuild = True
+    def app_rebuild(self, groups=()):
+        self.app.notify(groups=groups)
 
 
     def on_any_event(self, event):
@@ -31,105 +44,179 @@ class FileChangeHandler(FileSystemEventHandler):
             # This is causing false rebuild
             return
 
-        if event.src_path == self.app.config_file:
-            self.app_reload()
-
+        # editors save into a temporary file which is moved into place
+        paths = [event.src_path, getattr(event, 'dest_path', None)]
+        for path in paths:
+            if not path:
+                continue
+            if path == self.app.config_file:
+                self.app_reload()
+            else:
+                groups = self.matcher.matches(path)
+                if groups:
+                    groups.discard(None)
+                    self.app_rebuild(groups)
+
+
+    def set_files(self, files, groups=None):
+        """Watch the files, `groups` are the names of the groups they're
+        the sources of."""
+        if groups is None:
+            groups = [None] * len(files)
+        self.matcher = PatternMatcher(files, groups)
+
+
+def watch_root(pattern):
+    """Returns (directory, recursive) which must be watched for the pattern.
+
+    Missing directories are replaced by their nearest existing parent which
+    is watched recursively, to notice them being created.
+    """
+    pattern = pattern.replace('\\', '/')
+    if pattern.endswith('/'):
+        pattern += '**'
+    parts = os.path.realpath(pattern).split(os.path.sep)
+
+    # the directory part ends before the first wildcard
+    index = len(parts) - 1
+    for i, part in enumerate(parts[:-1]):
+        if '*' in part or '?' in part:
+            index = i
+            break
+
+    dirname = os.path.sep.join(parts[:index]) or os.path.sep
+    recursive = index < len(parts) - 1 or parts[-1] == '**'
+    while not os.path.isdir(dirname):
+        parent = os.path.dirname(dirname)
+        if parent == dirname:
+            break
+        dirname = parent
+        recursive = True
+    return dirname, recursive
+
+
+def minimal_watches(roots):
+    """Drop the (directory, recursive) roots covered by a recursive watch of
+    the same or a parent directory, returns the rest sorted.
+
+    The directories are put in a trie of their path components, a recursive
+    watch cuts the subtree below it.
+    """
+    trie = {}
+    # recursive first, so the others see them on their way down
+    for dirname, recursive in sorted(set(roots), key=lambda x: not x[1]):
+        node = trie
+        for part in dirname.split(os.path.sep):
+            if part:
+                if node.get(None, (None, False))[1]:
+                    break
+                node = node.setdefault(part, {})
         else:
-            filters = self.file_patterns
-            for name in event.src_path.split(os.path.sep):
-                filters = self.filter_reduce(name, filters)
-
-            filters = [f for f in filters if len(f) == 0 or f[0] != '**']
-            if len(filters):
-                self.app_rebuild()
-
-
-    def set_files(self, files):
-        self.file_patterns = [self.parse_pattern(f) for f in files]
-
-
-    @staticmethod
-    def parse_pattern(x):
-        filter_ = []
-        x = x.replace('\\', '/').replace('//', '/')
-        if x.endswith('/'):
-            x += '**'
-
-        for k in x.split('/'):
-            if k == '**':
-                filter_.append(k)
+            if recursive:
+                node.clear()
+                node[None] = (dirname, True)
+            elif None not in node:
+                node[None] = (dirname, False)
+
+    watches = []
+    stack = [trie]
+    while stack:
+        node = stack.pop()
+        for part, child in node.items():
+            if part is None:
+                watches.append(child)
             else:
-                k = k.replace('.', '[.]').replace('*','.*').replace('?', '.').\
-                        replace('+', '\\+')
+                stack.append(child)
+    return sorted(watches)
 
-                k = '^%s$' % k
-                exp = re.compile(k)
-                filter_.append(exp)
 
-        return filter_
-
-
-    @staticmethod
-    def filter_reduce(name, filters):
-        ret_filters = []
-        for lst in filters:
-            if not lst:
-                pass
-            elif lst[0] == '**':
-                ret_filters.append(lst)
-                if len(lst) > 1:
-                    if lst[1].match(name):
-                        ret_filters.append(lst[2:])
-                else:
-                    ret_filters.append([])
-            elif lst[0].match(name):
-                ret_filters.append(lst[1:])
-
-        return ret_filters
+def backend_name(observer):
+    """For example "inotify" for InotifyObserver."""
+    name = type(observer).__name__
+    if name.endswith('Observer'):
+        name = name[:-len('Observer')]
+    return name.lower()
 
 
 class FileObserver(object):
 
     app = None
-    observers = None
+    backend = None
     handler = None
+    observer = None
+    watches = None
 
-    def __init__(self, app):
+    def __init__(self, app, backend='auto'):
         self.app = app
-        self.observers = []
+        self.backend = backend
         self.handler = FileChangeHandler(app)
+        self.watches = []
 
 
-    def open(self, files):
-        self.handler.set_files(files)
+    def start_observer(self, observer_class):
+        """Start an observer of all the watched directories."""
+        observer = observer_class()
+        try:
+            for dirname, recursive in self.watches:
+                observer.schedule(self.handler, dirname, recursive=recursive)
+            observer.start()
+        except OSError:
+            # stop the emitters started before the failing one
+            observer.stop()
+            raise
+        return observer
 
-        dirnames = set()
-        dirnames.add(os.path.dirname(self.app.config_file))
 
-        for filename in files:
-            while True:
-                filename = os.path.dirname(os.path.realpath(filename))
-                if os.path.exists(filename) or not filename:
-                    break
+    @staticmethod
+    def is_healthy(observer):
+        """Native observers stop when they run out of watches."""
+        return observer.is_alive() and\
+                all(x.is_alive() for x in observer.emitters)
 
-            if filename:
-                for dirname in dirnames:
-                    if os.path.commonprefix([filename, dirname]) != dirname:
-                        dirnames.add(filename)
 
-        for dirname in dirnames:
-            observer = PollingObserver()
-            observer.schedule(self.handler, dirname, recursive=True)
-            observer.start()
+    def check(self):
+        """Replace the observer by a polling one if it stopped."""
+        observer = self.observer
+        if observer is None or isinstance(observer, PollingObserver) or\
+                self.is_healthy(observer):
+            return
 
-            self.observers.append(observer)
+        observer.stop()
+        print('%s observer stopped, polling instead' %\
+                backend_name(observer).capitalize())
+        self.observer = self.start_observer(PollingObserver)
 
 
-    def close(self):
-        for observer in self.observers:
-            observer.stop()
+    def backends(self):
+        if self.observer is None:
+            return []
+        return [backend_name(self.observer)]
 
-        for observer in self.observers:
-            observer.join()
 
-        self.observers = []
+    def open(self, files, groups=None):
+        self.handler.set_files(files, groups)
+
+        roots = [(os.path.dirname(self.app.config_file), False)]
+        roots.extend(watch_root(x) for x in files)
+        self.watches = minimal_watches(roots)
+
+        if self.backend != 'polling':
+            try:
+                self.observer = self.start_observer(NativeObserver)
+            except OSError as e:
+                if self.backend == 'native':
+                    raise
+                print('Cannot use native observer: %s' % e)
+        if self.observer is None:
+            self.observer = self.start_observer(PollingObserver)
+
+        print('Watching %s directories with %s observer' % (
+                len(self.watches), backend_name(self.observer)))
+
+
+    def close(self):
+        if self.observer is None:
+            return
+        self.observer.stop()
+        self.observer.join()
+        self.observer = None
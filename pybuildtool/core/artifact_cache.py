@@ -0,0 +1,261 @@
+""" Artifact cache shared by the build variants and the checkouts of a project.
+
+The outputs of a task are stored by their content, under a key made of what
+produced them: the tool, its configuration, the content of the input files,
+and the tool executable.  A task finding its key in the cache gets its outputs
+restored instead of running.
+
+Layout of the cache directory:
+
+    * ac/<key[:2]>/<key> : json list of the task outputs, their digest and
+                         : file mode.
+
+    * cas/<digest[:2]>/<digest> : file content, digest is its sha256.
+
+Settings, in the configuration environment (`ctx.env`):
+
+    * ARTIFACT_CACHE : str, None
+                     : Cache directory, the cache is disabled if not set.
+                     : See `pybuildtool.core.remote_cache` for a cache shared
+                     : over HTTP.
+
+    * ARTIFACT_CACHE_SIZE : int or str, 5G
+                          : Size limit of the cache, in bytes or with K, M, G
+                          : suffix.  The least recently used files are removed
+                          : after a build added files to the cache.
+
+    * ARTIFACT_CACHE_HARDLINK : bool, False
+                              : Restore outputs as hardlinks, they must not be
+                              : modified afterward.
+"""
+from hashlib import sha256
+import json
+import os
+import stat
+import threading
+from time import time
+#-
+from ..misc.copy_utils import clone_file, temp_filename
+from .remote_cache import prefetch_tasks, RemoteArtifactCache
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_SIZE = 5 << 30
+SIZE_SUFFIXES = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(value, default=DEFAULT_SIZE):
+    if not value:
+        return default
+    if isinstance(value, int):
+        return value
+    value = value.strip().upper().rstrip('B')
+    if value[-1:] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+def file_digest(filename):
+    hasher = sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def touch(filename):
+    """Mark file as recently used."""
+    try:
+        os.utime(filename)
+    except OSError:
+        pass
+
+
+class ArtifactCache():
+
+    root = None
+    max_size = None
+    hardlink = False
+    # bytes added by this build
+    added = 0
+
+    _lock = None
+
+    def __init__(self, root, max_size=DEFAULT_SIZE, hardlink=False):
+        self.root = root
+        self.max_size = max_size
+        self.hardlink = hardlink
+        self._lock = threading.Lock()
+
+
+    def path(self, kind, name):
+        return os.path.join(self.root, kind, name[:2], name)
+
+
+    def _write(self, filename, data):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        temp = temp_filename(filename)
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, filename)
+
+
+    def write_manifest(self, key, manifest):
+        self._write(self.path('ac', key), json.dumps(manifest).encode())
+
+
+    def write_object(self, digest, data):
+        self._write(self.path('cas', digest), data)
+        with self._lock:
+            self.added += len(data)
+
+
+    def load_manifest(self, key):
+        try:
+            with open(self.path('ac', key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+    def restore(self, key, file_out):
+        """Restore task outputs, returns False if they were not cached."""
+        manifest = self.load_manifest(key)
+        if manifest is None or len(manifest) != len(file_out):
+            return False
+
+        objects = [self.path('cas', x['digest']) for x in manifest]
+        if not all(os.path.isfile(x) for x in objects):
+            return False
+
+        try:
+            for obj, entry, filename in zip(objects, manifest, file_out):
+                os.makedirs(os.path.dirname(filename), exist_ok=True)
+                clone_file(obj, filename, hardlink=self.hardlink)
+                if not self.hardlink:
+                    os.chmod(filename, entry['mode'])
+                touch(obj)
+        except OSError:
+            # removed by garbage collection in the meantime
+            return False
+        touch(self.path('ac', key))
+        return True
+
+
+    def store(self, key, file_out):
+        """Store task outputs, returns the manifest."""
+        manifest = []
+        added = 0
+        for filename in file_out:
+            digest = file_digest(filename)
+            obj = self.path('cas', digest)
+            if os.path.exists(obj):
+                touch(obj)
+            else:
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                clone_file(filename, obj)
+                added += os.path.getsize(obj)
+            manifest.append({
+                'digest': digest,
+                'mode': stat.S_IMODE(os.stat(filename).st_mode),
+            })
+        self.write_manifest(key, manifest)
+        with self._lock:
+            self.added += added + 1
+        return manifest
+
+
+    def _iter_files(self):
+        for kind in ('ac', 'cas'):
+            for dirpath, _, filenames in os.walk(os.path.join(self.root,
+                    kind)):
+
+                for name in filenames:
+                    filename = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(filename)
+                    except OSError:
+                        continue
+                    yield kind, filename, st
+
+
+    def stats(self):
+        result = {
+            'entries': 0,
+            'objects': 0,
+            'size': 0,
+            'max_size': self.max_size,
+        }
+        for kind, _, st in self._iter_files():
+            if kind == 'ac':
+                result['entries'] += 1
+            else:
+                result['objects'] += 1
+            result['size'] += st.st_size
+        return result
+
+
+    def gc(self, max_size=None):
+        """Remove the least recently used files until the cache fits in
+        `max_size`, returns number of files and bytes removed."""
+        if max_size is None:
+            max_size = self.max_size
+
+        files = []
+        size = 0
+        stale = time() - 86400
+        for _, filename, st in self._iter_files():
+            if filename.endswith('.tmp') and st.st_mtime < stale:
+                # left by interrupted writes
+                files.append((0, filename, st.st_size))
+            else:
+                files.append((st.st_mtime, filename, st.st_size))
+            size += st.st_size
+        files.sort()
+
+        removed = 0
+        freed = 0
+        for mtime, filename, file_size in files:
+            if size <= max_size and mtime:
+                break
+            try:
+                os.unlink(filename)
+            except OSError:
+                continue
+            size -= file_size
+            removed += 1
+            freed += file_size
+        return removed, freed
+
+
+def get_artifact_cache(bld):
+    """Artifact cache configured for the build, or None."""
+    try:
+        return bld._artifact_cache
+    except AttributeError:
+        pass
+
+    root = bld.env.ARTIFACT_CACHE
+    url = bld.env.ARTIFACT_CACHE_URL
+    if url and not root:
+        # downloads need a place to be kept
+        root = os.path.join(bld.out_dir, '.artifact_cache')
+    if root:
+        cache = ArtifactCache(os.path.expanduser(root),
+                max_size=parse_size(bld.env.ARTIFACT_CACHE_SIZE),
+                hardlink=bool(bld.env.ARTIFACT_CACHE_HARDLINK))
+        if url:
+            cache = RemoteArtifactCache(cache, url,
+                    compression=bld.env.ARTIFACT_CACHE_COMPRESSION or 'none',
+                    connections=int(bld.env.ARTIFACT_CACHE_CONNECTIONS or 8),
+                    read_only=bool(bld.env.ARTIFACT_CACHE_READ_ONLY))
+            bld.add_pre_fun(prefetch_tasks)
+
+        def collect_garbage(bld): # pylint:disable=unused-argument
+            if cache.added:
+                cache.gc()
+
+        bld.add_post_fun(collect_garbage)
+    else:
+        cache = None
+    bld._artifact_cache = cache
+    return cache
@@ -0,0 +1,80 @@
+from collections.abc import MutableMapping
+
+class Config(MutableMapping):
+    """
+    Copy-on-write view of task configuration.
+
+    The layers are looked up in order, they're shared by the tasks of a rule
+    and must not be modified.  Changes made by a task are kept in the view.
+    """
+
+    layers = None
+    changes = None
+    deleted = None
+
+    def __init__(self, *layers):
+        self.layers = layers
+        self.changes = {}
+        self.deleted = set()
+
+
+    def __getitem__(self, key):
+        try:
+            return self.changes[key]
+        except KeyError:
+            pass
+        if key not in self.deleted:
+            for layer in self.layers:
+                if key in layer:
+                    return layer[key]
+        raise KeyError(key)
+
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+    def __contains__(self, key):
+        if key in self.changes:
+            return True
+        if key in self.deleted:
+            return False
+        return any(key in layer for layer in self.layers)
+
+
+    def __setitem__(self, key, value):
+        self.changes[key] = value
+        self.deleted.discard(key)
+
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.changes.pop(key, None)
+        self.deleted.add(key)
+
+
+    def __iter__(self):
+        seen = set(self.deleted)
+        for layer in (self.changes,) + self.layers:
+            for key in layer:
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield key
+
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self.items()))
+
+
+    def new_child(self):
+        """Another view of the same layers, without this view's changes."""
+        return type(self)(*self.layers)
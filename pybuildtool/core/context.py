@@ -1,5 +1,8 @@
 import os
-from waflib import Context, Errors # pylint:disable=import-error
+from waflib import Context, Errors, Logs # pylint:disable=import-error
+from waflib.Build import BuildContext # pylint:disable=import-error
+#-
+from .artifact_cache import get_artifact_cache
 
 class WatchContext(Context.Context):
     cmd = 'watch'
@@ -25,3 +28,40 @@ class WatchContext(Context.Context):
         return os.path.join(self.out_dir, self.variant)
 
     variant_dir = property(get_variant_dir, None)
+
+
+class CacheStatsContext(BuildContext):
+    """shows the artifact cache usage"""
+    cmd = 'cache_stats'
+    # the settings come from the environment of the variant, give the
+    # command a variant like the build commands, see wscript.example
+
+    def get_artifact_cache(self):
+        self.restore()
+        if not self.all_envs:
+            self.load_envs()
+        cache = get_artifact_cache(self)
+        if cache is None:
+            self.fatal('The artifact cache is not configured, set ' +\
+                    'ARTIFACT_CACHE in configure()')
+        return cache
+
+
+    def execute(self):
+        cache = self.get_artifact_cache()
+        stats = cache.stats()
+        Logs.info('Artifact cache: %s', cache.root)
+        Logs.info('Entries: %i', stats['entries'])
+        Logs.info('Objects: %i', stats['objects'])
+        Logs.info('Size: %.1f MiB of %.1f MiB', stats['size'] / 1048576.0,
+                stats['max_size'] / 1048576.0)
+
+
+class CacheGcContext(CacheStatsContext):
+    """removes the least recently used files from the artifact cache"""
+    cmd = 'cache_gc'
+
+    def execute(self):
+        cache = self.get_artifact_cache()
+        removed, freed = cache.gc()
+        Logs.info('Removed %i files, %.1f MiB', removed, freed / 1048576.0)
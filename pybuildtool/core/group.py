@@ -1,7 +1,12 @@
+from copy import deepcopy
 import os
+from types import MappingProxyType
 from waflib.Logs import debug # pylint:disable=import-error
+from waflib.Task import TaskSemaphore # pylint:disable=import-error
+from .artifact_cache import get_artifact_cache
 from .rule import Rule
-from ..misc.collections_utils import data_merge
+from .token_store import get_token_store
+from ..misc.collections_utils import data_merge, make_list
 
 class Group():
 
@@ -13,6 +18,12 @@ class Group():
 
     level = 1
     rule = None
+    # tasks created by the rule
+    tasks = None
+
+    fullname = None
+    patterns = None
+    resources = None
 
     def __init__(self, name, group, config):
         self.name = name
@@ -22,25 +33,26 @@ class Group():
             self.level = group.level + 1
             self.context = group.context
             data_merge(self.conf, group.conf)
+            self.fullname = '/'.join((group.fullname, name))
+            patterns = dict(group.patterns)
+        else:
+            self.fullname = name
+            patterns = {}
         data_merge(self.conf, config)
 
+        # replacement patterns, {_N} is group name of level N
+        patterns['_%s' % self.level] = name
+        self.patterns = MappingProxyType(patterns)
+        # cache of expand_resource()
+        self.resources = {}
+
 
     def get_name(self):
-        names = [self.name]
-        parent = self.group
-        while parent:
-            names.append(parent.name)
-            parent = parent.group
-        return '/'.join(reversed(names))
+        return self.fullname
 
 
     def get_patterns(self):
-        patterns = {}
-        parent = self
-        while parent:
-            patterns['_%s' % parent.level] = parent.name
-            parent = parent.group
-        return patterns
+        return self.patterns
 
 
     def __enter__(self):
@@ -51,23 +63,60 @@ class Group():
         pass
 
 
-    def __call__(self, file_in, file_out, depend_in, extra_out):
+    def __call__(self, file_in, file_out, depend_in, extra_out, rule_in=None):
         bld = self.group.context
         try:
             task_class = bld.tools[self.name].Task
         except KeyError:
             bld.fatal('Unknown tool: ' + self.name)
 
+        # Resolved once, shared read-only by the tasks of this rule.
         conf = {}
-        data_merge(conf, self.conf)
-        data_merge(conf, task_class.conf)
+        data_merge(conf, deepcopy(self.conf))
+        data_merge(conf, deepcopy(task_class.conf))
+        if task_class.batch_size is not None:
+            conf.setdefault('_batch_size_', task_class.batch_size)
 
         self.rule = Rule(self, conf, file_in, file_out, depend_in, extra_out)
-        for r in self.rule.rules:
-            task = task_class(self.group, conf, env=bld.env)
-            task_uid = task._id
+        self.tasks = []
+        task_conf = task_class.resolve_config(conf)
+
+        # set up before the build starts, the remote cache prefetches the
+        # outputs of the tasks
+        get_artifact_cache(bld)
+
+        # tokens of the rules this rule depends on
+        token_store = get_token_store(bld)
+        token_in = []
+        for name in make_list(rule_in):
+            token_in += bld._token_names[name]
+
+        # the scheduler keeps the tasks waiting instead of the workers
+        max_parallel = conf.get('_max_parallel_')
+        if max_parallel:
+            semaphore = TaskSemaphore(int(max_parallel))
+        else:
+            semaphore = None
 
-            for f in r.get('file_in', []):
+        for r in self.rule.rules:
+            task = task_class(self.group, task_conf, env=bld.env)
+            if semaphore is not None:
+                task.semaphore = semaphore
+            if token_store.use_nodes:
+                depend_in = r.depend_in + tuple(token_in)
+                extra_out = r.extra_out + r.token_out
+            else:
+                depend_in = r.depend_in
+                extra_out = r.extra_out
+                task.token_store = token_store
+                task.token_in += token_in
+                task.token_out += r.token_out
+                for token in token_in:
+                    task.set_run_after(token_store.producers[token])
+                for token in r.token_out:
+                    token_store.producers[token] = task
+
+            for f in r.file_in:
                 if os.path.isabs(f):
                     if not os.path.exists(f):
                         continue
@@ -80,19 +129,19 @@ class Group():
                 debug('%s:%s: %s', 'input', 'file_in', str(node))
                 task.set_inputs(node)
 
-            for f in r.get('depend_in', []):
+            for f in depend_in:
                 if os.path.isabs(f):
                     node = bld.root.find_or_declare(f)
                 else:
                     node = bld.path.find_or_declare(f)
                 if node is None:
                     bld.fatal('"%s" does not exists' % f)
-                setattr(node, 'is_virtual_in_' + task_uid, True)
+                task.virtual_in.add(id(node))
 
                 debug('%s:%s: %s', 'input', 'depend_in', str(node))
                 task.set_inputs(node)
 
-            for f in r.get('file_out', []):
+            for f in r.file_out:
                 if f.startswith(os.path.sep):
                     # create outside files
                     f_dir = os.path.dirname(f)
@@ -109,7 +158,7 @@ class Group():
                 debug('%s:%s: %s', 'output', 'file_out', str(node))
                 task.set_outputs(node)
 
-            for f in r.get('extra_out', []):
+            for f in extra_out:
                 if f.startswith(os.path.sep):
                     # create outside files
                     f_dir = os.path.dirname(f)
@@ -122,10 +171,11 @@ class Group():
                     node = d_node.make_node(os.path.basename(f))
                 else:
                     node = bld.path.find_or_declare(f)
-                setattr(node, 'is_virtual_out_' + task_uid, True)
+                task.virtual_out.add(id(node))
 
                 debug('%s:%s: %s', 'output', 'extra_out', str(node))
                 task.set_outputs(node)
 
             bld.add_to_group(task)
+            self.tasks.append(task)
         return self.rule
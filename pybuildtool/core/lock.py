@@ -0,0 +1,91 @@
+""" Locks held by running tasks.
+
+The tasks of a group run in the same waf process, they only need a lock file
+to keep another waf process (for example `waf watch` and a manual build) from
+working on the same group.  The lock file is acquired by the first running
+task of the group and released by the last one.
+
+`_max_parallel_` is not a lock, waf's scheduler limits the running tasks of
+the rule with a `TaskSemaphore`, see `Group.__call__`.
+"""
+from contextlib import contextmanager
+import os
+import threading
+#-
+import locket
+
+_registry_lock = threading.Lock()
+
+
+class GroupLock():
+
+    filename = None
+
+    _acquiring = False
+    _condition = None
+    _count = 0
+    _file_lock = None
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._condition = threading.Condition()
+
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            # another task of the group is waiting for the lock file
+            while self._acquiring:
+                self._condition.wait()
+            if self._count:
+                self._count += 1
+                return
+            self._acquiring = True
+
+        # waiting for the lock file doesn't block the release of the lock
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            file_lock = locket.lock_file(self.filename, timeout=timeout)
+            file_lock.acquire()
+        except BaseException:
+            with self._condition:
+                self._acquiring = False
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._file_lock = file_lock
+            self._count = 1
+            self._acquiring = False
+            self._condition.notify_all()
+
+
+    def release(self):
+        with self._condition:
+            self._count -= 1
+            if not self._count:
+                self._file_lock.release()
+                self._file_lock = None
+
+
+    @contextmanager
+    def hold(self, timeout=None):
+        """Raises `locket.LockError` if another process holds the lock."""
+        self.acquire(timeout)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+def get_group_lock(bld, filename):
+    """Lock shared by the tasks using the same lock file."""
+    with _registry_lock:
+        try:
+            locks = bld._group_locks
+        except AttributeError:
+            locks = bld._group_locks = {}
+        try:
+            return locks[filename]
+        except KeyError:
+            lock = locks[filename] = GroupLock(filename)
+            return lock
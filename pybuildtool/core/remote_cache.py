@@ -0,0 +1,254 @@
+""" Artifact cache shared over HTTP.
+
+The protocol is the one of bazel-remote: `GET` and `PUT` on `/ac/<key>` for
+the task manifests, and on `/cas/<sha256>` for the file contents; `HEAD`
+tells if the server has an entry.  Bodies are sent as they are by default,
+bazel-remote checks the `/cas/` bodies against their hash.  With
+`ARTIFACT_CACHE_COMPRESSION` they're sent compressed with their
+`Content-Encoding` header, for servers returning them as they were stored,
+like `pybuildtool.misc.cache_server`, but not bazel-remote.  The manifests
+are JSON, bazel-remote needs `--disable_http_ac_validation` to store them.
+
+Downloads go into a local artifact cache, tasks restore their outputs from
+there.  The manifests and files of the cacheable tasks which inputs already
+exist are fetched in parallel before the build starts.
+
+`pybuildtool.misc.cache_server` is a server which can be used for testing.
+
+Settings, in the configuration environment (`ctx.env`):
+
+    * ARTIFACT_CACHE_URL : str, None
+                         : Server address, for example http://localhost:8080/
+
+    * ARTIFACT_CACHE_COMPRESSION : str, none
+                                 : One of zlib, lzma, bz2, none.  Only
+                                 : none works with bazel-remote.
+
+    * ARTIFACT_CACHE_CONNECTIONS : int, 8
+                                 : Parallel connections to the server.
+
+    * ARTIFACT_CACHE_READ_ONLY : bool, False
+                               : Don't upload outputs.
+"""
+import bz2
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+import json
+import lzma
+import os
+import queue
+import threading
+from urllib.parse import urlsplit
+import zlib
+
+# compression name -> (Content-Encoding, compress)
+COMPRESSORS = {
+    'zlib': ('deflate', zlib.compress),
+    'lzma': ('xz', lzma.compress),
+    'bz2': ('bzip2', bz2.compress),
+    'none': ('identity', None),
+}
+
+DECOMPRESSORS = {
+    'deflate': zlib.decompress,
+    'xz': lzma.decompress,
+    'bzip2': bz2.decompress,
+    'identity': None,
+}
+
+NETWORK_ERRORS = (OSError, HTTPException)
+
+
+class ConnectionPool():
+    """Keep-alive connections to a HTTP server, shared by threads."""
+
+    host = None
+    port = None
+    prefix = None
+    timeout = None
+    connection_class = None
+
+    _idle = None
+    _semaphore = None
+
+    def __init__(self, url, size=8, timeout=30):
+        parsed = urlsplit(url)
+        if parsed.scheme == 'https':
+            self.connection_class = HTTPSConnection
+        else:
+            self.connection_class = HTTPConnection
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._semaphore = threading.BoundedSemaphore(size)
+
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns response status, headers and body."""
+        with self._semaphore:
+            try:
+                conn = self._idle.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn = self.connection_class(self.host, self.port,
+                        timeout=self.timeout)
+                reused = False
+
+            while True:
+                try:
+                    conn.request(method, self.prefix + path, body,
+                            headers or {})
+                    response = conn.getresponse()
+                    data = response.read()
+                    break
+                except NETWORK_ERRORS:
+                    conn.close()
+                    if not reused:
+                        raise
+                    # the server closed the idle connection, try a new one
+                    reused = False
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return response.status, response.headers, data
+
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class RemoteArtifactCache():
+
+    local = None
+    pool = None
+    encoding = None
+    compress = None
+    connections = None
+    read_only = False
+
+    def __init__(self, local, url, compression='none', connections=8,
+            read_only=False):
+
+        self.local = local
+        self.pool = ConnectionPool(url, size=connections)
+        self.encoding, self.compress = COMPRESSORS[compression]
+        self.connections = connections
+        self.read_only = read_only
+
+
+    def __getattr__(self, name):
+        # size, statistics and garbage collection are those of the local
+        # cache
+        return getattr(self.local, name)
+
+
+    def _get(self, kind, name):
+        status, headers, data = self.pool.request('GET', '/%s/%s' % (kind,
+                name), headers={'Accept-Encoding': ', '.join(DECOMPRESSORS)})
+        if status != 200:
+            return None
+        decompress = DECOMPRESSORS.get(headers.get('Content-Encoding',
+                'identity'), False)
+        if decompress is False:
+            return None
+        if decompress is not None:
+            data = decompress(data)
+        return data
+
+
+    def _exists(self, kind, name):
+        status, _, _ = self.pool.request('HEAD', '/%s/%s' % (kind, name))
+        return status == 200
+
+
+    def _put(self, kind, name, data):
+        headers = {}
+        if self.compress is not None:
+            headers['Content-Encoding'] = self.encoding
+            data = self.compress(data)
+        headers['Content-Length'] = str(len(data))
+        status, _, _ = self.pool.request('PUT', '/%s/%s' % (kind, name),
+                body=data, headers=headers)
+        return status in (200, 201, 204)
+
+
+    def fetch(self, key):
+        """Download task outputs into the local cache, returns False if the
+        server doesn't have them."""
+        if self.local.load_manifest(key) is not None:
+            return True
+        try:
+            data = self._get('ac', key)
+            if data is None:
+                return False
+            manifest = json.loads(data.decode())
+            for entry in manifest:
+                digest = entry['digest']
+                if os.path.isfile(self.local.path('cas', digest)):
+                    continue
+                data = self._get('cas', digest)
+                if data is None or sha256(data).hexdigest() != digest:
+                    return False
+                self.local.write_object(digest, data)
+        except NETWORK_ERRORS + (ValueError, KeyError, zlib.error,
+                lzma.LZMAError):
+            return False
+        self.local.write_manifest(key, manifest)
+        return True
+
+
+    def prefetch(self, keys):
+        """Download many task outputs at the same time."""
+        with ThreadPoolExecutor(max_workers=self.connections) as executor:
+            return sum(executor.map(self.fetch, set(keys)))
+
+
+    def restore(self, key, file_out):
+        if self.local.restore(key, file_out):
+            return True
+        return self.fetch(key) and self.local.restore(key, file_out)
+
+
+    def store(self, key, file_out):
+        manifest = self.local.store(key, file_out)
+        if self.read_only:
+            return manifest
+        try:
+            for entry in manifest:
+                digest = entry['digest']
+                if self._exists('cas', digest):
+                    continue
+                with open(self.local.path('cas', digest), 'rb') as f:
+                    data = f.read()
+                self._put('cas', digest, data)
+            self._put('ac', key, json.dumps(manifest).encode())
+        except NETWORK_ERRORS:
+            pass
+        return manifest
+
+
+def prefetch_tasks(bld):
+    """Fetch outputs of the cacheable tasks of the build."""
+    cache = bld._artifact_cache
+    keys = []
+    for group in bld.groups:
+        for task in group:
+            is_cacheable = getattr(task, 'is_cacheable', None)
+            if is_cacheable is None or not is_cacheable():
+                continue
+            # outputs of other tasks are not there yet
+            if not all(os.path.exists(x.abspath()) for x in task.inputs\
+                    if x.parent.name != '.tokens'):
+                continue
+            keys.append(task.get_cache_key())
+    if keys:
+        cache.prefetch(keys)
@@ -1,17 +1,26 @@
-from hashlib import md5
+from collections import namedtuple
 import os
 import re
 #-
+from ..misc.file_index import get_file_index
 from ..misc.path import expand_resource
+from .token_store import get_token_store
 
 
-def token_to_filename(token_name, bld):
-    return os.path.join(bld.variant_dir, '.tokens',
-            token_name.replace('/', '__'))
+# Inputs and outputs of a single task.
+RuleItem = namedtuple('RuleItem', ('file_in', 'file_out', 'depend_in',
+        'extra_out', 'token_out'))
 
 
 class Rule():
 
+    replace_patterns = None
+
+    _basedir = None
+    _files = None
+    _output_names = None
+    _rules = None
+
     def __init__(self, group, config, file_in, file_out, depend_in, extra_out):
         self.conf = config or {}
         self.file_in = file_in or []
@@ -27,9 +36,13 @@ class Rule():
 
         # normalize `_replace_patterns_`, must be a list of list
         self.conf.setdefault('_replace_patterns_', [])
+        self.replace_patterns = tuple((re.compile(pat), rep) for (pat, rep)\
+                in self.conf['_replace_patterns_'])
+        self._output_names = {}
 
 
     def _expand_input_wilcards(self, items):
+        file_index = get_file_index(self.bld)
         for_removal = []
         for_insertion = []
         for f in items:
@@ -37,28 +50,18 @@ class Rule():
                 continue
             for_removal.append(f)
             if os.path.isabs(f):
-                paths = self.bld.root.ant_glob(f.lstrip('/'))
-                for_insertion += (node.abspath() for node in paths)
+                for_insertion += file_index.glob(f)
             else:
-                paths = self.bld.path.ant_glob(f)
-                for_insertion += (node.relpath() for node in paths)
+                for_insertion += file_index.glob(f, self.bld.path.abspath(),
+                        relative=True)
         for f in for_removal:
             items.remove(f)
         items += for_insertion
 
 
-    def _extra_plus_token(self, file_out=None):
-        for f in self.extra_out:
-            yield f
-
-        token_out = token_to_filename(self.group.get_name(), self.bld)
-        if file_out:
-            if hasattr(file_out, 'encode'):
-                token_out += '-' + md5(file_out.encode()).hexdigest()
-            else:
-                token_out += '-' + md5(file_out).hexdigest()
-
+    def _token(self, file_out=None):
         group_name = self.group.get_name()
+        token_out = get_token_store(self.bld).make_token(group_name, file_out)
         try:
             token_names = self.bld._token_names[group_name]
         except KeyError:
@@ -68,42 +71,64 @@ class Rule():
             token_names = []
             self.bld._token_names = {group_name: token_names}
         token_names.append(token_out)
+        return token_out
+
 
-        yield token_out
+    def _output_name(self, file_in):
+        """File name inside output directory for input file."""
+        try:
+            return self._output_names[file_in]
+        except KeyError:
+            pass
+
+        fofi = file_in
+        for (pat, rep) in self.replace_patterns:
+            fofi = pat.sub(rep, fofi)
+        # use basedir to produce file_out
+        if self._basedir is None:
+            basedir = self.conf.get('_source_basedir_', False)
+            if basedir:
+                basedir = expand_resource(self.group, basedir)
+            self._basedir = basedir or ''
+        if self._basedir and fofi.startswith(self._basedir):
+            fofi = fofi[len(self._basedir):].strip('/')
+        else:
+            fofi = os.path.basename(fofi)
+
+        self._output_names[file_in] = fofi
+        return fofi
 
 
     @property
     def files(self):
         # returns the output files after being processes by this tool
-        result = []
-        #if not self.file_out:
-        #    return result
+        if self._files is not None:
+            return self._files
 
+        result = []
         for fo in self.file_out:
             is_dir = fo.endswith(os.path.sep)
             if is_dir:
                 for fi in self.file_in:
-                    fofi = fi
-                    for (pat, rep) in self.conf['_replace_patterns_']:
-                        fofi = re.sub(pat, rep, fofi)
-                    basedir = self.conf.get('_source_basedir_', False)
-                    if basedir:
-                        basedir = expand_resource(self.group, basedir)
-                    if basedir and fofi.startswith(basedir):
-                        fofi = fofi[len(basedir):].strip('/')
-                    else:
-                        fofi = os.path.basename(fofi)
-                    result.append(os.path.join(fo, fofi))
+                    result.append(os.path.join(fo, self._output_name(fi)))
             else:
                 result.append(fo)
         for fo in self.extra_out:
             result.append(fo)
-        return result
+
+        self._files = tuple(result)
+        return self._files
 
 
     @property
     def rules(self):
+        if self._rules is not None:
+            return self._rules
+
         result = []
+        file_in = tuple(self.file_in)
+        depend_in = tuple(self.depend_in)
+        extra_out = tuple(self.extra_out)
 
         if self.extra_out and (len(self.file_out) > 1 or\
                 (self.file_out and self.file_out[0].endswith(
@@ -112,62 +137,44 @@ class Rule():
             self.bld.fatal('Cannot use extra_out with multiple file_out')
 
         for fo in self.file_out:
-            if not self.file_in:
+            if not file_in:
                 # okay this is weird, no file_in but there is a file_out
                 # it is possible though, but shouldn't you use extra_out?
-                result.append({
-                    'file_in': self.file_in,
-                    'file_out': [fo],
-                    'depend_in': self.depend_in,
-                    'extra_out': self._extra_plus_token(fo),
-                })
+                result.append(RuleItem(file_in, (fo,), depend_in,
+                        extra_out, (self._token(fo),)))
                 continue
 
             if self.conf.get('_source_grouped_', False):
-                result.append({
-                    'file_in': self.file_in,
-                    'file_out': [fo],
-                    'depend_in': self.depend_in,
-                    'extra_out': self._extra_plus_token(fo),
-                })
+                result.append(RuleItem(file_in, (fo,), depend_in,
+                        extra_out, (self._token(fo),)))
                 continue
 
             is_dir = fo.endswith(os.path.sep)
-            for fi in self.file_in:
+            batch_size = self.conf.get('_batch_size_')
+            if is_dir and batch_size is not None:
+                # tasks with many inputs and their outputs, in the same order
+                batch_size = batch_size or len(file_in)
+                for start in range(0, len(file_in), batch_size):
+                    fis = file_in[start:start + batch_size]
+                    fofis = tuple(os.path.join(fo, self._output_name(fi))\
+                            for fi in fis)
+                    result.append(RuleItem(fis, fofis, depend_in, extra_out,
+                            tuple(self._token(x) for x in fofis)))
+                continue
+
+            for fi in file_in:
                 if not is_dir:
-                    result.append({
-                        'file_in': [fi],
-                        'file_out': [fo],
-                        'depend_in': self.depend_in,
-                        'extra_out': self._extra_plus_token(fo),
-                    })
+                    result.append(RuleItem((fi,), (fo,), depend_in,
+                            extra_out, (self._token(fo),)))
                     continue
 
-                fofi = fi
-                for (pat, rep) in self.conf['_replace_patterns_']:
-                    fofi = re.sub(pat, rep, fofi)
-                # use basedir to produce file_out
-                basedir = self.conf.get('_source_basedir_', False)
-                if basedir:
-                    basedir = expand_resource(self.group, basedir)
-                if basedir and fofi.startswith(basedir):
-                    fofi = fofi[len(basedir):].strip('/')
-                else:
-                    fofi = os.path.basename(fofi)
-
-                fofi = os.path.join(fo, fofi)
-                result.append({
-                    'file_in': [fi],
-                    'file_out': [fofi],
-                    'depend_in': self.depend_in,
-                    'extra_out': self._extra_plus_token(fofi),
-                })
+                fofi = os.path.join(fo, self._output_name(fi))
+                result.append(RuleItem((fi,), (fofi,), depend_in,
+                        extra_out, (self._token(fofi),)))
 
         if not self.file_out:
-            result.append({
-                'file_in': self.file_in,
-                'depend_in': self.depend_in,
-                'extra_out': self._extra_plus_token(),
-            })
+            result.append(RuleItem(file_in, (), depend_in,
+                    extra_out, (self._token(),)))
 
-        return result
+        self._rules = tuple(result)
+        return self._rules
@@ -31,60 +31,90 @@ Options:
                          : The list elements consist of two items: python regex
                          : and replacement.
 
+    * _batch_size_ : int, None
+                   : If the output is a directory, have this many input files
+                   : in a task, with their outputs in the same order.
+                   : All of them if 0, one if None.
+                   : The default is the `batch_size` attribute of the tool,
+                   : only tools handling many files in a task have it.
+
     * _no_io_ : bool, False
               : This task doesn't need inputs or outputs.
               : Only works if written in build.yml.
 
+    * _max_parallel_ : int, None
+                     : How many tasks of the rule may run at the same time,
+                     : unlimited by default.  Waiting tasks don't hold waf's
+                     : workers.
+
+    * _cache_ : bool, None
+              : Store the outputs in the artifact cache and restore them
+              : from it instead of running the task, the default is the
+              : `cacheable` attribute of the tool.
+              : See `pybuildtool.core.artifact_cache`.
+
+    * _cutoff_ : bool, None
+               : The token of the task records the content hash of its
+               : outputs (or inputs, if it has none), the files of directory
+               : outputs included, instead of the time it ran, rules
+               : depending on it with `rule_in` are skipped if the outputs
+               : didn't change.
+
 """
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from hashlib import md5, sha1, sha256
+import inspect
+import json
 import os
-from copy import deepcopy
 from time import time
-from uuid import uuid4
 #-
 import locket
 import stringcase
-from waflib.Task import Task as BaseTask # pylint:disable=import-error
+from waflib.Task import RUN_ME, SKIP_ME, Task as BaseTask # pylint:disable=import-error
 #-
 from ..misc.collections_utils import make_list
 from ..misc.path import expand_resource
-from .rule import token_to_filename
+from ..misc.hash_cache import get_filehash
+from ..misc.node_pool import get_node_pool
+from .artifact_cache import file_digest, get_artifact_cache
+from .config import Config
+from .lock import get_group_lock
+from .token_store import get_token_store, token_to_filename
 
 class Task(BaseTask):
 
     args = None
     args_case = 'spinal'
+    # default `_batch_size_`
+    batch_size = None
+    # outputs only depend on the inputs and configuration, they can be taken
+    # from the artifact cache
+    cacheable = False
     conf = None
     group = None
     file_in = None
     file_out = None
     name = None
+    # options of the javascript API of the tool, used by exec_node(), None
+    # if the tool must run its executable
+    node_options = None
     token_in = None
     token_out = None
-
-    _id = None
+    # set if the tokens are not waf nodes
+    token_store = None
+    virtual_in = None
+    virtual_out = None
 
     def __init__(self, group, config, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._id = uuid4().hex
 
-        # Task's configuration can be declared higher in the build tree,
-        # but it needs to be prefixed with its tool-name.
-        # Tool-name however can only be defined by the tool's module by
-        # observing predefined `__name__` variable, which value is the name
-        # of the tool's module.
-        if config:
-            my_config = deepcopy(config)
-            if self.name:
-                name = self.name + '_'
-                for key in config.keys():
-                    if not key.startswith(name):
-                        continue
-                    task_conf = key[len(name):]
-                    if task_conf in config:
-                        continue
-                    my_config[task_conf] = config[key]
+        # The configuration is shared by the tasks of a rule, every task gets
+        # its own copy-on-write view of it.
+        if isinstance(config, Config):
+            my_config = config.new_child()
         else:
-            my_config = {}
+            my_config = self.resolve_config(config or {})
         self.args = []
         self.conf = my_config
         self.group = group
@@ -92,6 +122,65 @@ class Task(BaseTask):
         self.file_out = []
         self.token_in = []
         self.token_out = []
+        # id() of nodes which are only dependencies, not the actual inputs or
+        # outputs of the tool
+        self.virtual_in = set()
+        self.virtual_out = set()
+
+
+    @classmethod
+    def resolve_config(cls, config):
+        """Create configuration to be shared by the tasks of a rule.
+
+        `config` must not be modified afterward.
+        """
+        # Task's configuration can be declared higher in the build tree,
+        # but it needs to be prefixed with its tool-name.
+        # Tool-name however can only be defined by the tool's module by
+        # observing predefined `__name__` variable, which value is the name
+        # of the tool's module.
+        prefixed = {}
+        if cls.name:
+            name = cls.name + '_'
+            for key, value in config.items():
+                if not key.startswith(name):
+                    continue
+                task_conf = key[len(name):]
+                if task_conf in config:
+                    continue
+                prefixed[task_conf] = value
+        return Config(config, prefixed)
+
+
+    def uid(self):
+        try:
+            return self.uid_
+        except AttributeError:
+            pass
+        uid = super().uid()
+        if self.token_store is not None and self.token_out:
+            # tasks without outputs would otherwise share the same uid
+            m = md5(uid)
+            for token in self.token_out:
+                m.update(token.encode())
+            self.uid_ = m.digest()
+        return self.uid_
+
+
+    def sig_explicit_deps(self):
+        super().sig_explicit_deps()
+        if self.token_store is not None:
+            for token in self.token_in:
+                value = self.token_store.get(token) or ''
+                self.m.update(('%s\0%s\0' % (token, value)).encode())
+
+
+    def runnable_status(self):
+        ret = super().runnable_status()
+        if ret == SKIP_ME and self.token_store is not None and\
+                not all(self.token_store.exists(x) for x in self.token_out):
+            return RUN_ME
+        return ret
 
 
     def prepare(self):
@@ -108,13 +197,11 @@ class Task(BaseTask):
             nodes = expand_resource(self.group, f)
             source_exclude += make_list(nodes)
 
-        task_uid = self._id
-
         for node in self.inputs:
             path = node.abspath()
             if node.parent.name == '.tokens':
                 self.token_in.append(path)
-            elif getattr(node, 'is_virtual_in_' + task_uid, False):
+            elif id(node) in self.virtual_in:
                 pass
             elif path in source_exclude:
                 pass
@@ -125,33 +212,78 @@ class Task(BaseTask):
             path = node.abspath()
             if node.parent.name == '.tokens':
                 self.token_out.append(path)
-            elif getattr(node, 'is_virtual_out_' + task_uid, False):
+            elif id(node) in self.virtual_out:
                 pass
             else:
                 self.file_out.append(path)
 
 
+    def get_content_token(self):
+        """Token value which only changes with the content of the outputs."""
+        hasher = sha1()
+        for path in self.file_out or self.file_in:
+            if os.path.isdir(path):
+                # directory outputs, by the names and content of their files
+                filenames = []
+                for dirpath, dirnames, files in os.walk(path):
+                    dirnames.sort()
+                    filenames.extend(os.path.join(dirpath, x) for x in\
+                            sorted(files))
+            else:
+                filenames = [path]
+
+            for filename in filenames:
+                hasher.update(filename.encode() + b'\0')
+                if os.path.isfile(filename):
+                    hasher.update(get_filehash(filename, self.bld) or b'')
+        return hasher.hexdigest()
+
+
     def finalize_shadow_jutsu(self, create_only=False):
-        for filename in self.token_out:
-            if create_only and os.path.exists(filename):
+        token_store = get_token_store(self.bld)
+        cutoff = self.conf.get('_cutoff_', False)
+        if cutoff:
+            value = self.get_content_token()
+        else:
+            value = str(time())
+
+        for token in self.token_out:
+            if create_only and token_store.exists(token):
                 continue
-            try:
-                os.makedirs(os.path.dirname(filename))
-            except OSError:
-                pass
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(str(time()))
+            if cutoff and token_store.get(token) == value:
+                continue
+            token_store.set(token, value)
+
+
+    def is_cacheable(self):
+        return self.conf.get('_cache_', self.cacheable)
 
 
     def run(self):
         self.prepare_shadow_jutsu()
+        # the key follows the configuration as it was given to the task
+        if self.is_cacheable():
+            cache = get_artifact_cache(self.bld)
+        else:
+            cache = None
+        if cache is not None:
+            cache_key = self.get_cache_key()
+        else:
+            cache_key = None
         self.prepare()
 
         lock_filename = '%s.lck' % token_to_filename(self.group.get_name(),
                 self.bld)
+        lock = get_group_lock(self.bld, lock_filename)
         try:
-            with locket.lock_file(lock_filename, timeout=5):
-                ret = self.perform()
+            with lock.hold(timeout=5):
+                if cache_key and cache.restore(cache_key, self.file_out):
+                    self.bld.to_log('Task %s restored from cache.\n' %\
+                            self.group.get_name())
+                    cache_key = None
+                    ret = 0
+                else:
+                    ret = self.perform()
         except locket.LockError:
             self.bld.to_log("Task %s has already started.\n" %\
                     self.group.get_name())
@@ -164,10 +296,153 @@ class Task(BaseTask):
         elif ret in make_list(self.conf.get('_success_retcodes_')):
             ret = None
         if not ret:
+            if cache_key:
+                try:
+                    cache.store(cache_key, self.file_out)
+                except OSError as e:
+                    self.bld.to_log('Cannot store %s in cache: %s\n' % (
+                            self.group.get_name(), e))
             self.finalize_shadow_jutsu(create_only)
         return ret
 
 
+    def _relpath(self, filename):
+        """Path which is the same in other variants and checkouts."""
+        variant_dir = os.path.join(self.bld.variant_dir, '')
+        if filename.startswith(variant_dir):
+            return '@' + filename[len(variant_dir):]
+        return os.path.relpath(filename, self.bld.top_dir)
+
+
+    def _tool_digests(self):
+        """Digests of the tool executable and of the tool module."""
+        try:
+            digests = self.bld._tool_digests
+        except AttributeError:
+            digests = self.bld._tool_digests = {}
+
+        filenames = [inspect.getfile(type(self))]
+        executable = self.env['%s_BIN' % (self.name or '').upper()]
+        if executable:
+            filenames.append(executable)
+
+        result = []
+        for filename in filenames:
+            try:
+                result.append(digests[filename])
+                continue
+            except KeyError:
+                pass
+            try:
+                digest = file_digest(filename)
+            except OSError:
+                digest = None
+            digests[filename] = digest
+            result.append(digest)
+        return result
+
+
+    def get_cache_key(self):
+        """Artifact cache key, made of what produces the outputs."""
+        inputs = []
+        for node in self.inputs:
+            if node.parent.name == '.tokens':
+                continue
+            filename = node.abspath()
+            digest = get_filehash(filename, self.bld)
+            inputs.append((self._relpath(filename),
+                    digest.hex() if digest else None))
+
+        outputs = []
+        for node in self.outputs:
+            if node.parent.name == '.tokens' or id(node) in self.virtual_out:
+                continue
+            outputs.append(self._relpath(node.abspath()))
+
+        data = {
+            'tool': self.name,
+            'class': '%s.%s' % (type(self).__module__,
+                    type(self).__qualname__),
+            'tool_digests': self._tool_digests(),
+            'config': dict(self.conf),
+            'inputs': inputs,
+            'outputs': outputs,
+            'production': self.is_production(),
+        }
+        data = json.dumps(data, sort_keys=True, default=repr)
+        return sha256(data.encode()).hexdigest()
+
+
+    def batch_pairs(self):
+        """(input, output) pairs of the task, for tools with `batch_size`."""
+        if not self.file_in or len(self.file_in) != len(self.file_out):
+            self.bld.fatal('%s needs an output for every input, got %s' % (
+                    (self.name or '').capitalize(), repr(self.file_out)))
+        return list(zip(self.file_in, self.file_out))
+
+
+    def run_batch(self, func, items=None, workers=None):
+        """Call `func(*item)` for the items, (input, output) pairs by
+        default, one after another or by `workers` threads.
+
+        waf already runs as many tasks as it has jobs, more workers multiply
+        the processes started.  Returns the first return code which is not
+        0, or 0.
+        """
+        if items is None:
+            items = self.batch_pairs()
+        if workers is None:
+            workers = 1
+
+        def run(item):
+            return func(*item)
+
+        if workers < 2 or len(items) < 2:
+            results = map(run, items)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers,
+                    len(items))) as executor:
+                results = list(executor.map(run, items))
+        for ret in results:
+            if ret:
+                return ret
+        return 0
+
+
+    def exec_argv(self, argv, stdin=None, stdout=None, **kwargs):
+        """Run the command without shell.
+
+        `argv` is the list of the executable and its arguments, `stdin` and
+        `stdout` are names of the files the command reads and writes
+        instead of its standard input and output.
+        """
+        with ExitStack() as stack:
+            if stdin is not None:
+                kwargs['stdin'] = stack.enter_context(open(stdin, 'rb'))
+            if stdout is not None:
+                kwargs['stdout'] = stack.enter_context(open(stdout, 'wb'))
+            return self.exec_command([str(x) for x in argv], **kwargs)
+
+
+    def exec_node(self, file_in, file_out, cwd=None):
+        """Run the tool in the node worker pool instead of its executable.
+
+        Returns None if it can't, because the pool is not enabled or the tool
+        has no `node_options`, see `pybuildtool.misc.node_pool`.
+        """
+        if self.node_options is None:
+            return None
+        pool = get_node_pool(self.bld)
+        if pool is None:
+            return None
+
+        error = pool.run(self.name, file_in, file_out, self.node_options, cwd)
+        if error:
+            self.bld.to_log('%s: %s\n' % (self.name, error))
+            return 1
+        return 0
+
+
     @staticmethod
     def is_production():
         return os.environ.get('PROJECT_VARIANT_IS_PRODUCTION') == '1'
@@ -0,0 +1,165 @@
+""" Tokens mark the completion of the tasks of a rule.
+
+Tasks which depend on other rules (`rule_in`) are run again after the token
+of those rules changed.
+
+Two stores are available, selected with `TOKEN_STORE` in the configuration
+environment (`ctx.env.TOKEN_STORE = 'journal'`):
+
+    * file : default, a file per token in `.tokens`, which are waf nodes.
+
+    * journal : every token is a line appended to `.tokens.journal` in the
+              : variant directory, task signatures include the token values.
+"""
+from hashlib import md5
+import os
+import threading
+
+
+def token_to_filename(token_name, bld):
+    return os.path.join(bld.variant_dir, '.tokens',
+            token_name.replace('/', '__'))
+
+
+class FileTokenStore():
+
+    # tokens are waf nodes, the task signatures follow them
+    use_nodes = True
+
+    bld = None
+
+    def __init__(self, bld):
+        self.bld = bld
+
+
+    def make_token(self, group_name, file_out=None):
+        token = token_to_filename(group_name, self.bld)
+        if file_out:
+            if hasattr(file_out, 'encode'):
+                token += '-' + md5(file_out.encode()).hexdigest()
+            else:
+                token += '-' + md5(file_out).hexdigest()
+        return token
+
+
+    def exists(self, token): # pylint:disable=no-self-use
+        return os.path.exists(token)
+
+
+    def get(self, token): # pylint:disable=no-self-use
+        try:
+            with open(token, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+    def set(self, token, value): # pylint:disable=no-self-use
+        try:
+            os.makedirs(os.path.dirname(token))
+        except OSError:
+            pass
+        with open(token, 'w', encoding='utf-8') as f:
+            f.write(value)
+
+
+class JournalTokenStore():
+
+    use_nodes = False
+
+    bld = None
+    filename = None
+    # token -> task which creates it
+    producers = None
+    values = None
+
+    _file = None
+    _lock = None
+
+    def __init__(self, bld):
+        self.bld = bld
+        self.filename = os.path.join(bld.variant_dir, '.tokens.journal')
+        self.producers = {}
+        self.values = {}
+        self._lock = threading.Lock()
+        self.load()
+
+
+    def load(self):
+        lines = 0
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        # unfinished write
+                        break
+                    token, _, value = line[:-1].partition('\t')
+                    self.values[token] = value
+                    lines += 1
+        except OSError:
+            return
+
+        # later lines overwrite the earlier ones, drop those
+        if lines > 2 * len(self.values) + 100:
+            self.compact()
+
+
+    def compact(self):
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as f:
+            for token, value in self.values.items():
+                f.write('%s\t%s\n' % (token, value))
+        os.replace(temp_filename, self.filename)
+
+
+    def make_token(self, group_name, file_out=None): # pylint:disable=no-self-use
+        if file_out:
+            return '%s:%s' % (group_name, file_out)
+        return group_name
+
+
+    def exists(self, token):
+        return token in self.values
+
+
+    def get(self, token):
+        return self.values.get(token)
+
+
+    def set(self, token, value):
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+                self._file = open(self.filename, 'a', encoding='utf-8') # pylint:disable=consider-using-with
+                self.bld.add_post_fun(lambda bld: self.close())
+            self._file.write('%s\t%s\n' % (token, value))
+            self._file.flush()
+            self.values[token] = value
+
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+TOKEN_STORES = {
+    'file': FileTokenStore,
+    'journal': JournalTokenStore,
+}
+
+
+def get_token_store(bld):
+    try:
+        return bld._token_store
+    except AttributeError:
+        pass
+
+    name = bld.env.TOKEN_STORE or 'file'
+    try:
+        store_class = TOKEN_STORES[name]
+    except KeyError:
+        bld.fatal('Unknown token store: %s' % name)
+    bld._token_store = store_class(bld)
+    return bld._token_store
@@ -0,0 +1,137 @@
+""" Compiled build graph.
+
+Parsing build.yml, walking its groups and expanding the wildcards is costly on
+large configurations.  The result of that work is stored per variant, and
+reused as long as build.yml, the environment variables it refers to, and the
+directories the wildcards were matched against stay the same.
+"""
+from copy import deepcopy
+import hashlib
+import os
+import pickle
+#-
+from ..core.group import Group
+
+# Increase this when the layout of the stored graph changes.
+GRAPH_VERSION = 2
+
+
+def get_template_variables(template):
+    """Names of the variables used by chevron template."""
+    from chevron.tokenizer import tokenize # pylint:disable=import-error
+    names = set()
+    for tag, key in tokenize(template):
+        if tag in ('variable', 'no escape', 'section', 'inverted section'):
+            names.add(key)
+    return names
+
+
+def graph_filename(bld):
+    return os.path.join(bld.variant_dir, '.build_graph')
+
+
+class BuildGraph():
+
+    key = None
+    dirs = None
+    entries = None
+    skip_dirs = None
+
+    def __init__(self, key, skip_dirs=()):
+        self.key = key
+        # don't look into these, for example the build directory
+        self.skip_dirs = tuple(skip_dirs)
+        # directory -> st_mtime_ns, or None if it did not exist
+        self.dirs = {}
+        # list of (parent index, group name, options, rule or None)
+        self.entries = []
+
+
+    @staticmethod
+    def make_key(bld, template, environ):
+        """Identify build.yml content and the environment it was rendered
+        with."""
+        hasher = hashlib.sha1()
+        hasher.update(('%s\0%s\0%s\0' % (GRAPH_VERSION, bld.path.abspath(),
+                bld.variant)).encode())
+        hasher.update(template.encode())
+        for name in sorted(get_template_variables(template)):
+            hasher.update(('\0%s=%r' % (name, environ.get(name))).encode())
+        return hasher.hexdigest()
+
+
+    @classmethod
+    def load(cls, bld, key):
+        """Load stored graph, returns None if it was outdated."""
+        try:
+            with open(graph_filename(bld), 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if data.get('version') != GRAPH_VERSION or data.get('key') != key:
+            return None
+
+        for dirname, mtime in data['dirs'].items():
+            try:
+                current = os.stat(dirname).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return None
+
+        graph = cls(key)
+        graph.dirs = data['dirs']
+        graph.entries = data['entries']
+        return graph
+
+
+    def save(self, bld):
+        filename = graph_filename(bld)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        data = {
+            'version': GRAPH_VERSION,
+            'key': self.key,
+            'dirs': self.dirs,
+            'entries': self.entries,
+        }
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+
+
+    def add_group(self, name, parent_index, options):
+        self.entries.append([parent_index, name, deepcopy(options), None])
+        return len(self.entries) - 1
+
+
+    def add_rule(self, index, **kwargs):
+        self.entries[index][3] = deepcopy(kwargs)
+
+
+    def watch_dirs(self, mtimes):
+        """Remember the directories wildcards were matched against."""
+        skip_dirs = tuple(os.path.join(x, '') for x in self.skip_dirs)
+        for dirname, mtime in mtimes.items():
+            if dirname in self.skip_dirs or dirname.startswith(skip_dirs):
+                continue
+            self.dirs[dirname] = mtime
+
+
+    def apply(self, bld):
+        """Create waf targets from the stored graph."""
+        groups = {}
+        created = []
+        for parent_index, name, options, rule in self.entries:
+            if parent_index is None:
+                g = Group(name, None, options)
+                g.context = bld
+            else:
+                g = Group(name, created[parent_index], options)
+            created.append(g)
+            groups[g.get_name()] = g
+
+            if rule is not None:
+                g(**rule)
+
+        bld.task_gen_cache_names = groups
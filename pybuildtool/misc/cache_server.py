@@ -0,0 +1,149 @@
+""" HTTP artifact cache server, for testing `pybuildtool.core.remote_cache`.
+
+Only uses the python standard library, it can also be run as a script:
+
+    python -m pybuildtool.misc.cache_server --port 8080 --dir /tmp/cache
+
+Entries are stored as they were received, their `Content-Encoding` is kept
+as file name suffix and sent back with them.
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import re
+import threading
+
+PATH_REGEX = re.compile(r'^/(ac|cas)/([0-9a-f]{64})$')
+ENCODING_REGEX = re.compile(r'^[a-z0-9-]+$')
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def _entry(self):
+        """File name of the requested entry, without encoding suffix."""
+        match = PATH_REGEX.match(self.path)
+        if not match:
+            self._reply(400)
+            return None
+        kind, name = match.groups()
+        return os.path.join(self.server.root, kind, name[:2], name)
+
+
+    def _find(self, filename):
+        """Returns stored file name and its encoding."""
+        dirname, basename = os.path.split(filename)
+        try:
+            names = os.listdir(dirname)
+        except OSError:
+            return None, None
+        for name in names:
+            if name == basename:
+                return filename, 'identity'
+            if name.startswith(basename + '.') and not name.endswith('.tmp'):
+                return os.path.join(dirname, name), name[len(basename) + 1:]
+        return None, None
+
+
+    def _reply(self, status, data=b'', headers=None, send_body=True):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if send_body and data:
+            self.wfile.write(data)
+
+
+    def do_GET(self, send_body=True): # pylint:disable=invalid-name
+        filename = self._entry()
+        if filename is None:
+            return
+        filename, encoding = self._find(filename)
+        if filename is None:
+            self._reply(404, send_body=send_body)
+            return
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._reply(404, send_body=send_body)
+            return
+        self._reply(200, data, {'Content-Encoding': encoding},
+                send_body=send_body)
+
+
+    def do_HEAD(self): # pylint:disable=invalid-name
+        self.do_GET(send_body=False)
+
+
+    def do_PUT(self): # pylint:disable=invalid-name
+        filename = self._entry()
+        if filename is None:
+            return
+        encoding = self.headers.get('Content-Encoding', 'identity').lower()
+        if not ENCODING_REGEX.match(encoding):
+            self._reply(400)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        data = self.rfile.read(length)
+
+        # replace entry stored with another encoding
+        old_filename, _ = self._find(filename)
+        if encoding != 'identity':
+            filename += '.' + encoding
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        temp = '%s.%s.tmp' % (filename, threading.get_ident())
+        with open(temp, 'wb') as f:
+            f.write(data)
+        os.replace(temp, filename)
+        if old_filename and old_filename != filename:
+            try:
+                os.unlink(old_filename)
+            except OSError:
+                pass
+        self._reply(201)
+
+
+    def log_message(self, format, *args): # pylint:disable=redefined-builtin
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class CacheServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    root = None
+    verbose = False
+
+    def __init__(self, address, root, verbose=False):
+        super().__init__(address, CacheRequestHandler)
+        self.root = root
+        self.verbose = verbose
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--dir', default='.artifact_cache_server',
+            help='where the entries are stored')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = CacheServer((args.host, args.port), os.path.abspath(args.dir),
+            verbose=args.verbose)
+    print('Serving %s on http://%s:%i/' % (server.root, args.host,
+            server.server_port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
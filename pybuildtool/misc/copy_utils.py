@@ -0,0 +1,129 @@
+""" Copy files, sharing the data blocks if the file system allows it.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+from shutil import copyfile, copymode
+import threading
+from .hash_cache import get_filehash
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl request of Linux to share the data blocks of two files (reflink)
+FICLONE = 0x40049409
+CHUNK_SIZE = 1 << 20
+
+
+def temp_filename(filename):
+    """Unique name to write before moving the file into place."""
+    return '%s.%s-%s.tmp' % (filename, os.getpid(), threading.get_ident())
+
+
+def reflink(src, dst):
+    """Create `dst` sharing the data blocks of `src`.
+
+    Raises OSError if the file system doesn't support it.
+    """
+    if fcntl is None:
+        raise OSError('reflink is not supported')
+    with open(src, 'rb') as fsrc:
+        with open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except OSError:
+                fdst.close()
+                os.unlink(dst)
+                raise
+
+
+def clone_file(src, dst, hardlink=False):
+    """Replace `dst` with copy of `src`.
+
+    Tries a reflink, or a hardlink if allowed, before copying the content.
+    The file is written under temporary name and moved into place.
+    """
+    temp = temp_filename(dst)
+    try:
+        if hardlink:
+            try:
+                os.link(src, temp)
+                os.replace(temp, dst)
+                return
+            except OSError:
+                pass
+        try:
+            reflink(src, temp)
+        except OSError:
+            # shutil copies inside the kernel where it can, with sendfile()
+            # on Linux
+            copyfile(src, temp)
+        os.replace(temp, dst)
+    finally:
+        if os.path.lexists(temp):
+            os.unlink(temp)
+
+
+def copy_fd(src_fd, dst_fd):
+    """Append the rest of file `src_fd` to `dst_fd`, inside the kernel if
+    possible.  Returns number of bytes copied."""
+    copied = 0
+    for func in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, func):
+            continue
+        try:
+            while True:
+                if func == 'copy_file_range':
+                    size = os.copy_file_range(src_fd, dst_fd, CHUNK_SIZE << 4)
+                else:
+                    size = os.sendfile(dst_fd, src_fd, None, CHUNK_SIZE << 4)
+                if not size:
+                    return copied
+                copied += size
+        except OSError:
+            # not supported between these files, nothing was copied by the
+            # failing call
+            continue
+
+    while True:
+        data = os.read(src_fd, CHUNK_SIZE)
+        if not data:
+            return copied
+        os.write(dst_fd, data)
+        copied += len(data)
+
+
+def same_content(src, dst, bld):
+    """Tells if `dst` is already a copy of `src`, by their sizes and the
+    hashes remembered by the build."""
+    try:
+        if os.path.getsize(src) != os.path.getsize(dst):
+            return False
+    except OSError:
+        return False
+    src_hash = get_filehash(src, bld)
+    return src_hash is not None and src_hash == get_filehash(dst, bld)
+
+
+def copy_files(pairs, workers=None, hardlink=False, preserve_mode=False,
+        bld=None):
+    """Copy (source, destination) pairs on a thread pool.
+
+    With `bld`, the destinations which are already copies of their sources
+    are not copied again, see `same_content()`.  Returns the number of files
+    copied.
+    """
+    def run(pair):
+        src, dst = pair
+        if bld is not None and same_content(src, dst, bld):
+            return False
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        clone_file(src, dst, hardlink=hardlink)
+        if preserve_mode and not os.path.samefile(src, dst):
+            copymode(src, dst)
+        return True
+
+    if len(pairs) == 1:
+        return int(run(pairs[0]))
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        return sum(executor.map(run, pairs))
@@ -0,0 +1,168 @@
+""" Directory listing shared by wildcard expansions.
+
+`ant_glob()` lists the directories again for every pattern, with hundreds of
+patterns the same directories were read hundreds of times.  The index reads
+every directory once per build, and every ant pattern is compiled once.
+
+The matching rules are those of waf's `Node.ant_glob()`.
+"""
+from functools import lru_cache
+import os
+import re
+
+# Same as waf's `Node.exclude_regs`
+EXCLUDE_PATTERNS = (
+    '**/*~', '**/#*#', '**/.#*', '**/%*%', '**/._*', '**/*.swp', '**/CVS',
+    '**/CVS/**', '**/.cvsignore', '**/SCCS', '**/SCCS/**', '**/vssver.scc',
+    '**/.svn', '**/.svn/**', '**/BitKeeper', '**/.git', '**/.git/**',
+    '**/.gitignore', '**/.bzr', '**/.bzrignore', '**/.bzr/**', '**/.hg',
+    '**/.hg/**', '**/_MTN', '**/_MTN/**', '**/.arch-ids', '**/{arch}',
+    '**/_darcs', '**/_darcs/**', '**/.intlcache', '**/.DS_Store')
+
+# Path segments which can be looked up directly instead of being matched
+# against directory listing.
+LITERAL_SEGMENT = re.compile(r'^[^*?\[\](){}|^$\\]+$')
+
+
+@lru_cache(maxsize=None)
+def compile_pattern(pattern):
+    """Compile ant pattern into list of path segment matchers."""
+    result = []
+    pattern = pattern.replace('\\', '/').replace('//', '/')
+    if pattern.endswith('/'):
+        pattern += '**'
+
+    for k in pattern.split('/'):
+        if k == '**':
+            result.append(k)
+        else:
+            k = k.replace('.', '[.]').replace('*', '.*').replace('?', '.').\
+                    replace('+', '\\+')
+            result.append(re.compile('^%s$' % k))
+    return tuple(result)
+
+
+EXCLUDE_MATCHERS = tuple(compile_pattern(x) for x in EXCLUDE_PATTERNS)
+
+
+def filter_reduce(name, filters):
+    """Advance pattern matchers past path segment `name`."""
+    result = []
+    for lst in filters:
+        if not lst:
+            pass
+        elif lst[0] == '**':
+            result.append(lst)
+            if len(lst) > 1:
+                if lst[1].match(name):
+                    result.append(lst[2:])
+            else:
+                result.append(())
+        elif lst[0].match(name):
+            result.append(lst[1:])
+    return result
+
+
+def accept(name, pats):
+    include = filter_reduce(name, pats[0])
+    exclude = filter_reduce(name, pats[1])
+    if () in exclude:
+        include = []
+    return include, exclude
+
+
+class FileIndex():
+
+    # directory -> sorted list of (name, is_dir)
+    listing = None
+    # directory -> st_mtime_ns when it was listed, None if it didn't exist
+    mtimes = None
+
+    def __init__(self):
+        self.listing = {}
+        self.mtimes = {}
+
+
+    def listdir(self, dirname):
+        try:
+            return self.listing[dirname]
+        except KeyError:
+            pass
+        try:
+            self.mtimes[dirname] = os.stat(dirname).st_mtime_ns
+            with os.scandir(dirname) as it:
+                entries = sorted((entry.name, entry.is_dir()) for entry in it)
+        except OSError:
+            self.mtimes.setdefault(dirname, None)
+            entries = []
+        self.listing[dirname] = entries
+        return entries
+
+
+    def glob(self, pattern, basedir='/', maxdepth=25, relative=False):
+        """Files matching ant pattern, like `Node.ant_glob()`.
+
+        Returns absolute paths, or paths relative to `basedir`.
+        """
+        pattern = pattern.replace('\\', '/').lstrip('/')
+        pats = ((compile_pattern(pattern),), EXCLUDE_MATCHERS)
+
+        # Directly descend into the leading directories without wildcards.
+        dirname = basedir
+        prefix = []
+        segments = pattern.split('/')
+        for segment in segments[:-1]:
+            if segment in ('.', '..') or not LITERAL_SEGMENT.match(segment):
+                break
+            pats = accept(segment, pats)
+            if not pats[0] or maxdepth <= 0:
+                return []
+            dirname = os.path.join(dirname, segment)
+            if not os.path.isdir(dirname):
+                self.mtimes.setdefault(dirname, None)
+                return []
+            prefix.append(segment)
+            maxdepth -= 1
+
+        if relative:
+            return list(self._iter(dirname, pats, maxdepth,
+                    os.path.join(*prefix) if prefix else ''))
+        return list(self._iter(dirname, pats, maxdepth, dirname))
+
+
+    def _iter(self, dirname, pats, maxdepth, result_prefix):
+        for name, is_dir in self.listdir(dirname):
+            npats = accept(name, pats)
+            if not npats[0]:
+                continue
+            if result_prefix:
+                result = os.path.join(result_prefix, name)
+            else:
+                result = name
+            if not is_dir:
+                if () in npats[0]:
+                    yield result
+            elif maxdepth:
+                yield from self._iter(os.path.join(dirname, name), npats,
+                        maxdepth - 1, result)
+
+
+def get_file_index(bld):
+    """Directory listing shared by everything run while the build graph is
+    being created."""
+    try:
+        return bld._file_index
+    except AttributeError:
+        pass
+
+    if getattr(bld, '_file_index_closed', False):
+        # tasks are running and creating files, don't reuse old listing
+        return FileIndex()
+
+    def close_file_index(bld):
+        bld._file_index_closed = True
+        del bld._file_index
+
+    bld._file_index = FileIndex()
+    bld.add_pre_fun(close_file_index)
+    return bld._file_index
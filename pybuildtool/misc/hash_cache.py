@@ -0,0 +1,141 @@
+""" File hashes, remembered as long as the files didn't change.
+
+A file is considered unchanged while its device, inode, size, and
+modification time stay the same.  The hashes are kept per variant in
+`.hash_cache` of the variant directory.
+
+Files modified very recently are hashed but not remembered, another write
+within the resolution of the file system timestamps would go unnoticed.
+
+The hash algorithm is `sha1`, or the one named by `HASH_ALGORITHM` in the
+configuration environment, for example `blake2b` which is faster.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from time import time
+
+CHUNK_SIZE = 1 << 20
+# seconds
+RACY_WINDOW = 2
+# Increase this when the layout of the stored cache changes.
+CACHE_VERSION = 1
+
+
+def hash_file(filename, algorithm='sha1'):
+    """Digest of the file content, read in chunks."""
+    hasher = hashlib.new(algorithm)
+    buf = bytearray(CHUNK_SIZE)
+    view = memoryview(buf)
+    with open(filename, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buf)
+            if not size:
+                break
+            hasher.update(view[:size])
+    return hasher.digest()
+
+
+class HashCache():
+
+    algorithm = None
+    filename = None
+    # path -> (st_dev, st_ino, st_size, st_mtime_ns, digest)
+    entries = None
+
+    _dirty = False
+    _lock = None
+
+    def __init__(self, filename=None, algorithm='sha1'):
+        self.algorithm = algorithm
+        self.filename = filename
+        self.entries = {}
+        self._lock = threading.Lock()
+        if filename:
+            self.load()
+
+
+    def load(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return
+        if data.get('version') != CACHE_VERSION or\
+                data.get('algorithm') != self.algorithm:
+            return
+        self.entries = data['entries']
+
+
+    def save(self):
+        if not (self.filename and self._dirty):
+            return
+        with self._lock:
+            data = {
+                'version': CACHE_VERSION,
+                'algorithm': self.algorithm,
+                'entries': dict(self.entries),
+            }
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        temp_filename = '%s.%s.tmp' % (self.filename, os.getpid())
+        with open(temp_filename, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, self.filename)
+
+
+    def get(self, filename):
+        """Digest of the file content, None if it doesn't exist."""
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+        entry = self.entries.get(filename)
+        if entry is not None and entry[:4] == key:
+            return entry[4]
+
+        try:
+            digest = hash_file(filename, self.algorithm)
+        except OSError:
+            return None
+        if st.st_mtime_ns < (time() - RACY_WINDOW) * 1e9:
+            with self._lock:
+                self.entries[filename] = key + (digest,)
+                self._dirty = True
+        return digest
+
+
+    def forget(self, filename):
+        with self._lock:
+            if self.entries.pop(filename, None) is not None:
+                self._dirty = True
+
+
+# used without build context
+_default_cache = HashCache()
+
+
+def get_hash_cache(bld=None):
+    if bld is None:
+        return _default_cache
+    try:
+        return bld._hash_cache
+    except AttributeError:
+        pass
+
+    cache = HashCache(os.path.join(bld.variant_dir, '.hash_cache'),
+            algorithm=bld.env.HASH_ALGORITHM or 'sha1')
+    bld.add_post_fun(lambda bld: cache.save())
+    bld._hash_cache = cache
+    return cache
+
+
+def get_filehash(filename, bld=None):
+    """Digest of the file content, None if it doesn't exist.
+
+    With `bld` the hashes are remembered between builds.
+    """
+    return get_hash_cache(bld).get(filename)
@@ -0,0 +1,192 @@
+""" Long-lived Node.js processes running the javascript tools.
+
+Starting node and loading the modules of a tool takes longer than running
+the tool for a file.  The workers (`node_worker.js`) keep the modules loaded
+and run a job at a time, sent as a line of JSON on their stdin and answered
+with a line on their stdout.  A worker which died is started again.
+
+The pool is enabled with the number of workers in `NODE_WORKERS` of the
+configuration environment, and `NODE_BIN` names the node executable.
+Modules are looked up from the top directory of the project and from
+`NODE_PATH`.
+"""
+import json
+import os
+import subprocess
+import threading
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), 'node_worker.js')
+
+_pool_lock = threading.Lock()
+
+
+class NodeWorkerError(Exception):
+    """The worker died or talked nonsense, the job may not have run."""
+
+
+class NodeWorker():
+
+    process = None
+
+    _last_id = 0
+
+    def __init__(self, executable='node', cwd=None, env=None):
+        self.process = subprocess.Popen([executable, WORKER_SCRIPT],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=cwd,
+                env=env, universal_newlines=True, bufsize=1)
+
+
+    def alive(self):
+        return self.process.poll() is None
+
+
+    def call(self, job):
+        """Run the job, returns error message or None."""
+        self._last_id += 1
+        job = dict(job, id=self._last_id)
+        try:
+            self.process.stdin.write(json.dumps(job) + '\n')
+            self.process.stdin.flush()
+        except OSError as e:
+            raise NodeWorkerError(str(e))
+
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise NodeWorkerError('worker exited with %s' %\
+                        self.process.wait())
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # something else printed to stdout
+                continue
+            if isinstance(result, dict) and result.get('id') == job['id']:
+                return result.get('error')
+
+
+    def close(self):
+        if self.process.stdin:
+            self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class NodePool():
+
+    cwd = None
+    env = None
+    executable = None
+    size = None
+
+    _cond = None
+    _idle = None
+    _started = 0
+    _workers = None
+
+    def __init__(self, size, executable='node', cwd=None, env=None):
+        self.size = max(1, size)
+        self.executable = executable
+        self.cwd = cwd
+        self.env = env
+        self._cond = threading.Condition()
+        self._idle = []
+        self._workers = []
+
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._started >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+        try:
+            worker = NodeWorker(self.executable, self.cwd, self.env)
+        except OSError:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._workers.append(worker)
+        return worker
+
+
+    def _release(self, worker):
+        with self._cond:
+            if worker not in self._workers:
+                # the pool was closed
+                pass
+            elif worker.alive():
+                self._idle.append(worker)
+            else:
+                # a waiter starts another one
+                self._workers.remove(worker)
+                self._started -= 1
+            self._cond.notify()
+
+
+    def run(self, tool, file_in, file_out, options=None, cwd=None):
+        """Run javascript tool, returns error message or None.
+
+        The job is tried again in a new worker if the worker died.
+        """
+        job = {
+            'tool': tool,
+            'input': file_in,
+            'output': file_out,
+            'options': options or {},
+            'cwd': cwd,
+        }
+        for retry in (True, False):
+            worker = self._acquire()
+            try:
+                return worker.call(job)
+            except NodeWorkerError as e:
+                worker.close()
+                if not retry:
+                    return str(e)
+            finally:
+                self._release(worker)
+
+
+    def close(self):
+        with self._cond:
+            workers = list(self._workers)
+            self._workers = []
+            self._idle = []
+            self._started = 0
+            self._cond.notify_all()
+        for worker in workers:
+            worker.close()
+
+
+def get_node_pool(bld):
+    """Pool of the build, None if not enabled by `NODE_WORKERS`."""
+    with _pool_lock:
+        try:
+            return bld._node_pool
+        except AttributeError:
+            pass
+        bld._node_pool = pool = _create_node_pool(bld)
+        return pool
+
+
+def _create_node_pool(bld):
+    size = int(bld.env.NODE_WORKERS or 0)
+    if size <= 0:
+        return None
+
+    env = dict(os.environ)
+    node_path = [os.path.join(bld.top_dir, 'node_modules')]
+    if env.get('NODE_PATH'):
+        node_path.append(env['NODE_PATH'])
+    env['NODE_PATH'] = os.pathsep.join(node_path)
+    pool = NodePool(size, executable=bld.env.NODE_BIN or 'node',
+            cwd=bld.top_dir, env=env)
+    bld.add_post_fun(lambda bld: pool.close())
+    return pool
@@ -0,0 +1,126 @@
+// Long-lived worker of pybuildtool.misc.node_pool, runs the javascript tools
+// through their APIs so node and the tool modules are loaded only once.
+//
+// Reads a job per line on stdin:
+//     {"id": 1, "tool": "less", "input": "a.less", "output": "a.css",
+//      "options": {...}, "cwd": null}
+// and answers with a line on stdout:
+//     {"id": 1, "error": null}
+//
+// Modules are looked up from the starting directory and NODE_PATH.
+'use strict';
+
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+
+const baseDir = process.cwd();
+const writeResult = process.stdout.write.bind(process.stdout);
+// stdout belongs to the protocol
+console.log = console.info = console.error;
+const modules = {};
+
+function load(name) {
+    if (!(name in modules)) {
+        modules[name] = require(require.resolve(name, {paths: [baseDir]}));
+    }
+    return modules[name];
+}
+
+function templateName(filename) {
+    return path.basename(filename).replace(/\.[^.]*$/, '');
+}
+
+// tool -> function(source, job) returning the output or a promise of it
+const handlers = {
+    'less': (source, job) => load('less')
+        .render(source, Object.assign({filename: job.input}, job.options))
+        .then(result => result.css),
+
+    'clean-css': (source, job) => {
+        const CleanCSS = load('clean-css');
+        const result = new CleanCSS(job.options).minify(source);
+        if (result.errors.length) {
+            throw new Error(result.errors.join('\n'));
+        }
+        return result.styles;
+    },
+
+    'uglify-js': (source, job) => {
+        const result = load('uglify-js').minify(source, job.options);
+        if (result.error) {
+            throw result.error;
+        }
+        return result.code;
+    },
+
+    'postcss': (source, job) => {
+        const plugins = (job.options.use || []).map(name => load(name)());
+        return load('postcss')(plugins)
+            .process(source, {from: job.input, to: job.output,
+                map: job.options.map})
+            .then(result => result.css);
+    },
+
+    'stylus': (source, job) => new Promise((resolve, reject) => {
+        const style = load('stylus')(source).set('filename', job.input);
+        for (const [key, value] of Object.entries(job.options.set || {})) {
+            style.set(key, value);
+        }
+        for (const dir of job.options.include || []) {
+            style.include(dir);
+        }
+        for (const filename of job.options.import || []) {
+            style.import(filename);
+        }
+        style.render((err, css) => err ? reject(err) : resolve(css));
+    }),
+
+    'node-sass': (source, job) => load('node-sass')
+        .renderSync(Object.assign({data: source}, job.options))
+        .css.toString(),
+
+    'handlebars': (source, job) => {
+        const spec = load('handlebars').precompile(source, job.options);
+        if (job.options.simple) {
+            return spec + '\n';
+        }
+        const name = JSON.stringify(job.options.name ||
+                templateName(job.input));
+        return '(function() {\n' +
+            '  var template = Handlebars.template, templates = ' +
+            'Handlebars.templates = Handlebars.templates || {};\n' +
+            'templates[' + name + '] = template(' + spec + ');\n' +
+            '})();';
+    },
+
+    'nunjucks': (source, job) => load('nunjucks').precompileString(source,
+        Object.assign({name: job.input}, job.options)),
+};
+
+async function run(job) {
+    const handler = handlers[job.tool];
+    if (!handler) {
+        throw new Error('unknown tool: ' + job.tool);
+    }
+    const source = fs.readFileSync(job.input, 'utf8');
+    if (job.cwd) {
+        process.chdir(job.cwd);
+    }
+    try {
+        fs.writeFileSync(job.output, await handler(source, job));
+    } finally {
+        process.chdir(baseDir);
+    }
+}
+
+// jobs are run one at a time, the pool starts more workers for parallelism
+let queue = Promise.resolve();
+
+readline.createInterface({input: process.stdin}).on('line', line => {
+    const job = JSON.parse(line);
+    queue = queue.then(() => run(job)).then(
+        () => ({id: job.id, error: null}),
+        err => ({id: job.id, error: String(err && err.stack || err)}))
+        .then(result => writeResult(JSON.stringify(result) + '\n'));
+});
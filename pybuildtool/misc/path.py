@@ -1,28 +1,36 @@
 import os
 import subprocess
 import sys
+#-
+from .file_index import get_file_index
 
 def expand_resource(group, path):
     """Get real path of a resource."""
+    # Only found resources are cached, missing ones might have been created
+    # later by other tasks.
+    try:
+        return group.resources[path]
+    except KeyError:
+        pass
 
     bld = group.context
     # replacement pattern, {_N} will be replaced with group name of level N
-    path = path.format(**group.get_patterns())
-    path = os.path.expanduser(path)
-    if os.path.isabs(path):
-        if path.endswith(os.path.sep):
-            node = bld.root.find_dir(path.lstrip('/'))
+    realpath = path.format(**group.get_patterns())
+    realpath = os.path.expanduser(realpath)
+    if os.path.isabs(realpath):
+        if realpath.endswith(os.path.sep):
+            node = bld.root.find_dir(realpath.lstrip('/'))
         else:
-            node = bld.root.find_resource(path.lstrip('/'))
-        if node:
-            return node.abspath()
+            node = bld.root.find_resource(realpath.lstrip('/'))
     else:
-        if path.endswith(os.path.sep):
-            node = bld.path.find_dir(path)
+        if realpath.endswith(os.path.sep):
+            node = bld.path.find_dir(realpath)
         else:
-            node = bld.path.find_resource(path)
-        if node:
-            return node.abspath()
+            node = bld.path.find_resource(realpath)
+    if node:
+        realpath = node.abspath()
+        group.resources[path] = realpath
+        return realpath
     return None
 
 
@@ -36,14 +44,13 @@ def expand_wildcard(group, path, **kwargs):
         # to the wildcard template
         maxdepth = kwargs.get('maxdepth', 25)
         depth = path.rstrip(os.path.sep).count(os.path.sep)
+        file_index = get_file_index(bld)
         if os.path.isabs(path):
-            files = [node.abspath() for node in\
-                    bld.root.ant_glob(path.lstrip('/'),
-                    maxdepth=depth + maxdepth)]
+            files = file_index.glob(path, maxdepth=depth + maxdepth)
         else:
             depth += bld.out_dir.count(os.path.sep) + 1
-            files = [node.abspath() for node in bld.path.ant_glob(path,
-                    maxdepth=depth + maxdepth)]
+            files = file_index.glob(path, bld.path.abspath(),
+                    maxdepth=depth + maxdepth)
         if path.endswith(os.path.sep):
             dirnames = set()
             for filename in files:
@@ -0,0 +1,138 @@
+""" Match paths against many ant patterns at once.
+
+Walking every pattern for every path costs patterns times depth; the
+matcher compiles the patterns into a trie of their path segments instead.
+Literal segments are looked up in a dict, the wildcard segments of a trie
+node are tried with a single regex combining them, so the cost of a match
+depends on the depth of the path and not on the number of patterns.
+
+A path must match a pattern completely, with the rules of `file_index`.
+"""
+import os
+import re
+from pybuildtool.misc.file_index import LITERAL_SEGMENT
+
+
+class PatternNode(object):
+
+    # segment -> PatternNode
+    literals = None
+    # (regex, PatternNode) of the segments with wildcards
+    wildcards = None
+    # any of the wildcards, to reject the other segments with one match
+    wildcards_regex = None
+    # PatternNode after `**`, reached without consuming a segment
+    globstar = None
+    # `**` consumes any segment and stays here
+    loop = False
+    # values of the patterns ending here
+    values = None
+
+    def __init__(self):
+        self.literals = {}
+        self.wildcards = []
+        self.values = set()
+
+
+class PatternMatcher(object):
+    """Tells if a path matches any of the patterns, or which ones.
+
+    `values` are what `matches()` returns for the patterns, the patterns
+    themselves by default.
+    """
+
+    root = None
+
+    def __init__(self, patterns=(), values=None):
+        self.root = PatternNode()
+        wildcards = {}
+        patterns = list(patterns)
+        if values is None:
+            values = patterns
+        for pattern, value in zip(patterns, values):
+            self._add(pattern, value, wildcards)
+
+        for node, segments in wildcards.items():
+            node.wildcards = [(re.compile(segment_regex(x)), child)\
+                    for x, child in segments.items()]
+            node.wildcards_regex = re.compile('|'.join('(?:%s)' %\
+                    segment_regex(x) for x in segments))
+
+
+    def _add(self, pattern, value, wildcards):
+        pattern = pattern.replace('\\', '/').replace('//', '/')
+        if pattern.endswith('/'):
+            pattern += '**'
+        segments = pattern.split('/')
+        if segments[-1] == '**':
+            # `**` at the end matches at least one segment
+            segments.append('*')
+
+        node = self.root
+        for segment in segments:
+            if segment == '**':
+                if node.globstar is None:
+                    node.globstar = PatternNode()
+                    node.globstar.loop = True
+                node = node.globstar
+            elif LITERAL_SEGMENT.match(segment):
+                node = node.literals.setdefault(segment, PatternNode())
+            else:
+                node = wildcards.setdefault(node, {}).setdefault(segment,
+                        PatternNode())
+        node.values.add(value)
+
+
+    @staticmethod
+    def closure(nodes):
+        result = set()
+        while nodes:
+            node = nodes.pop()
+            if node not in result:
+                result.add(node)
+                if node.globstar is not None:
+                    nodes.append(node.globstar)
+        return result
+
+
+    def _walk(self, path):
+        """Trie nodes reached by the path."""
+        states = self.closure([self.root])
+        for name in path.split(os.path.sep):
+            following = []
+            for node in states:
+                if node.loop:
+                    following.append(node)
+                child = node.literals.get(name)
+                if child is not None:
+                    following.append(child)
+                if node.wildcards_regex is not None and\
+                        node.wildcards_regex.match(name):
+
+                    if len(node.wildcards) == 1:
+                        following.append(node.wildcards[0][1])
+                    else:
+                        following.extend(child for regex, child in\
+                                node.wildcards if regex.match(name))
+            if not following:
+                return ()
+            states = self.closure(following)
+        return states
+
+
+    def match(self, path):
+        return any(node.values for node in self._walk(path))
+
+
+    def matches(self, path):
+        """Values of the patterns matching the path."""
+        result = set()
+        for node in self._walk(path):
+            result.update(node.values)
+        return result
+
+
+def segment_regex(segment):
+    """Same translation as the ant patterns of `file_index`."""
+    return '^%s$' % segment.replace('.', '[.]').replace('*', '.*').\
+            replace('?', '.').replace('+', '\\+')
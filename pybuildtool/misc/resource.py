@@ -1,22 +1,26 @@
-import hashlib
-import mmap
 import os
 import re
+import yaml
+#-
 from ..core.group import Group
+from .build_graph import BuildGraph
 from .collections_utils import make_list
-
-def get_filehash(filename):
-    if not os.path.exists(filename):
-        return None
-    hasher = hashlib.sha1()
-    with open(filename, 'rb') as f:
-        with mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ) as mm:
-            hasher.update(mm)
-    return hasher.digest()
-
+from .file_index import get_file_index
+from .hash_cache import get_filehash # pylint:disable=unused-import
+from .yaml_utils import OrderedDictSafeLoader
 
 def get_source_files(conf, bld):
     """Collect raw file inputs."""
+    for _, files, _ in get_source_rules(conf, bld):
+        yield from files
+
+
+def get_source_rules(conf, bld):
+    """Collect raw file inputs of every rule.
+
+    Yields (group name, raw files, names of the rules it depends on), the
+    dependencies come from `rule_in` and the `@group` inputs.
+    """
     groups = {}
     constant_regex = re.compile(r'^[A-Z_]+$')
 
@@ -25,28 +29,36 @@ def get_source_files(conf, bld):
 
         options = config.pop('options', {})
         if group_is_leaf(config, options):
-            group_files = make_list(config.get('raw_file_in')) +\
-                    make_list(config.get('raw_depend_in'))
+            files = []
+            for f in make_list(config.get('raw_file_in')) +\
+                    make_list(config.get('raw_depend_in')):
 
-            for f in group_files:
                 f = f.format(**groups)
                 if os.path.isabs(f):
-                    yield f
+                    files.append(f)
                 else:
-                    yield os.path.join(bld.top_dir, f)
+                    files.append(os.path.join(bld.top_dir, f))
 
+            rules_in = [x.format(**groups) for x in make_list(
+                    config.get('rule_in'))]
+            for f in make_list(config.get('file_in')) +\
+                    make_list(config.get('depend_in')):
+
+                if f.startswith('@'):
+                    rules_in.append(f[1:].format(**groups))
+
+            name = '/'.join(groups['_%s' % x] for x in range(1, level + 1))
+            yield name, files, rules_in
             return
 
         for subgroup in config:
-            for f in parse_group(subgroup, config[subgroup], level + 1):
-                yield f
+            yield from parse_group(subgroup, config[subgroup], level + 1)
 
     for group in conf:
         if constant_regex.match(group):
             continue
 
-        for f in parse_group(group, conf[group], 1):
-            yield f
+        yield from parse_group(group, conf[group], 1)
 
 
 def group_is_leaf(group, options):
@@ -58,11 +70,42 @@ def group_is_leaf(group, options):
             or options.get('_no_io_', False)
 
 
-def prepare_targets(conf, bld):
-    """Create waf targets from predefined file input categories."""
+def load_targets(conf_file, bld, Loader=OrderedDictSafeLoader):
+    """Create waf targets from build configuration file.
+
+    The configuration file is a chevron template rendered with environment
+    variables.  Build graph compiled by previous run is reused if still
+    up to date.  `--targets` selects groups, see `select_targets()`.
+    """
+    import chevron # pylint:disable=import-error
+    with open(conf_file) as f:
+        template = f.read()
+    environ = dict(os.environ)
+
+    key = BuildGraph.make_key(bld, template, environ)
+    graph = BuildGraph.load(bld, key)
+    if graph is not None:
+        graph.apply(bld)
+    else:
+        graph = BuildGraph(key, skip_dirs=(bld.out_dir,))
+        conf = yaml.load(chevron.render(template, environ), Loader=Loader)
+        prepare_targets(conf, bld, graph)
+        # directories read while expanding wildcards
+        graph.watch_dirs(get_file_index(bld).mtimes)
+        graph.save(bld)
+    select_targets(bld)
+
+
+def prepare_targets(conf, bld, graph=None):
+    """Create waf targets from predefined file input categories.
+
+    If `graph` was given, the created groups are recorded in it.
+    """
 
     groups = {}
     constant_regex = re.compile(r'^[A-Z_]+$')
+    file_index = get_file_index(bld)
+    top_dir = bld.path.abspath()
 
     def _add_raw_files(raw_file_list, file_list, pattern):
         for f in raw_file_list:
@@ -74,8 +117,7 @@ def prepare_targets(conf, bld):
             if is_dir and not f.endswith(os.path.sep):
                 file_list.append(f + os.path.sep)
             elif '*' in f or '?' in f:
-                for node in bld.root.ant_glob(f.lstrip('/')):
-                    file_list.append(node.abspath())
+                file_list.extend(file_index.glob(f))
             else:
                 file_list.append(f)
 
@@ -88,16 +130,14 @@ def prepare_targets(conf, bld):
                     yield x
             elif not ('*' in f or '?' in f):
                 yield f
-            # expands wildcards (using ant_glob)
+            # expands wildcards (same as ant_glob)
             elif os.path.isabs(f):
-                for node in bld.root.ant_glob(f.lstrip('/')):
-                    yield node.abspath()
+                yield from file_index.glob(f)
             else:
-                for node in bld.path.ant_glob(f):
-                    yield node.relpath()
+                yield from file_index.glob(f, top_dir, relative=True)
 
 
-    def parse_group(group_name, config, level, parent_group):
+    def parse_group(group_name, config, level, parent_group, parent_index):
         try:
             options = config.pop('options', {})
         except Exception as e:
@@ -107,6 +147,10 @@ def prepare_targets(conf, bld):
         g = Group(group_name, parent_group, options)
         if parent_group is None:
             g.context = bld
+        if graph is not None:
+            index = graph.add_group(group_name, parent_index, options)
+        else:
+            index = None
 
         groups[g.get_name()] = g
         pattern = g.get_patterns()
@@ -135,12 +179,9 @@ def prepare_targets(conf, bld):
             rules_in = [x.format(**pattern) for x in make_list(
                     config.get('rule_in'))]
 
+            # the tokens of these rules are resolved by the group
             for rule_in in rules_in:
-                try:
-                    token_names = bld._token_names[rule_in]
-                    for f in token_names:
-                        depend_in.append(f)
-                except (KeyError, AttributeError):
+                if rule_in not in getattr(bld, '_token_names', {}):
                     print((parent_group.get_name(), group_name, dict(config),
                             level))
 
@@ -151,16 +192,89 @@ def prepare_targets(conf, bld):
                         bld.fatal("rule '%s' not found" % rule_in +\
                                 ", does it have *_in or *_out?")
 
+            if graph is not None:
+                graph.add_rule(index, file_in=file_in, file_out=file_out,
+                        depend_in=depend_in, extra_out=extra_out,
+                        rule_in=rules_in)
             g(file_in=file_in, file_out=file_out, depend_in=depend_in,
-                    extra_out=extra_out)
+                    extra_out=extra_out, rule_in=rules_in)
             return
 
         for subgroup in config:
-            parse_group(subgroup, config[subgroup], level + 1, g)
+            parse_group(subgroup, config[subgroup], level + 1, g, index)
 
     for group in conf:
         if constant_regex.match(group):
             continue
-        parse_group(group, conf[group], 1, None)
+        parse_group(group, conf[group], 1, None, None)
 
     bld.task_gen_cache_names = groups
+
+
+def select_targets(bld):
+    """Keep only the tasks of the groups named by `--targets`.
+
+    waf looks for task generators with the names of the targets, the rules
+    add tasks instead.  A target is the name of a group, it selects the
+    rules below it.  The tasks reading the outputs of the selected ones are
+    selected too, and all the tasks they run after or read the outputs of
+    are kept.
+    """
+    targets = getattr(bld, 'targets', None)
+    if not targets or targets == '*':
+        return
+
+    groups = getattr(bld, 'task_gen_cache_names', {})
+    selected = set()
+    for name in targets.split(','):
+        name = name.strip().strip('/')
+        if not name:
+            continue
+        prefix = name + '/'
+        found = False
+        for group_name, group in groups.items():
+            if group_name == name or group_name.startswith(prefix):
+                found = True
+                selected.update(group.tasks or ())
+        if not found:
+            bld.fatal("target '%s' does not exist" % name)
+
+    all_tasks = set()
+    producers = {}
+    consumers = {}
+    for group in groups.values():
+        for task in group.tasks or ():
+            all_tasks.add(task)
+            for node in task.outputs:
+                producers[node] = task
+            for node in task.inputs:
+                consumers.setdefault(node, []).append(task)
+            for dependency in task.run_after:
+                consumers.setdefault(dependency, []).append(task)
+
+    # the tasks reading outputs of the selected ones, by `rule_in`, `@group`
+    # or by the path of the output
+    pending = list(selected)
+    while pending:
+        task = pending.pop()
+        for node in [task] + list(task.outputs):
+            for consumer in consumers.get(node, ()):
+                if consumer not in selected:
+                    selected.add(consumer)
+                    pending.append(consumer)
+
+    pending = list(selected)
+    while pending:
+        task = pending.pop()
+        for dependency in list(task.run_after) + [producers.get(x) for x in\
+                task.inputs]:
+
+            if dependency is not None and dependency not in selected:
+                selected.add(dependency)
+                pending.append(dependency)
+
+    for index, tasks in enumerate(bld.groups):
+        bld.groups[index] = [x for x in tasks if x in selected or\
+                x not in all_tasks]
+    # nothing left for waf to look up
+    bld.targets = ''
@@ -55,3 +55,46 @@ class OrderedDictYAMLLoader(yaml.Loader):
             value = self.construct_object(value_node, deep=deep)
             mapping[key] = value
         return mapping
+
+
+try:
+    # libyaml bindings, much faster than the pure python implementation
+    _SafeLoader = yaml.CSafeLoader
+except AttributeError:
+    _SafeLoader = yaml.SafeLoader
+
+class OrderedDictSafeLoader(_SafeLoader): # pylint:disable=too-many-ancestors
+    """
+    A YAML safe loader that loads mappings into ordered dictionaries.
+
+    It uses libyaml if available, anchors and merge keys are supported.
+    """
+
+    def construct_ordered_map(self, node):
+        data = OrderedDict()
+        yield data
+        if not isinstance(node, yaml.MappingNode):
+            raise yaml.constructor.ConstructorError(None, None,
+                'expected a mapping node, but found %s' % node.id,
+                node.start_mark)
+
+        # resolves merge keys, `<<: *ANCHOR`
+        self.flatten_mapping(node)
+        for key_node, value_node in node.value:
+            key = self.construct_object(key_node)
+            try:
+                hash(key)
+            except TypeError as exc:
+                raise yaml.constructor.ConstructorError(
+                        'while constructing a mapping',
+                        node.start_mark,
+                        'found unacceptable key (%s)' % exc,
+                        key_node.start_mark)
+
+            data[key] = self.construct_object(value_node)
+
+
+OrderedDictSafeLoader.add_constructor('tag:yaml.org,2002:map',
+        OrderedDictSafeLoader.construct_ordered_map)
+OrderedDictSafeLoader.add_constructor('tag:yaml.org,2002:omap',
+        OrderedDictSafeLoader.construct_ordered_map)
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+from time import time
+import unittest
+#-
+from pybuildtool.core.artifact_cache import ArtifactCache, file_digest,\
+        parse_size
+
+
+def write_file(filename, data):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as f:
+        f.write(data)
+
+
+def read_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+class ArtifactCacheTest(unittest.TestCase):
+
+    cache = None
+    tmp = None
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ArtifactCache(os.path.join(self.tmp, 'cache'))
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+
+    def outputs(self, *contents):
+        files = []
+        for ii, data in enumerate(contents):
+            filename = os.path.join(self.tmp, 'out', 'file%i' % ii)
+            write_file(filename, data)
+            files.append(filename)
+        return files
+
+
+    def test_round_trip(self):
+        file_out = self.outputs(b'first', b'second')
+        os.chmod(file_out[1], 0o755)
+        manifest = self.cache.store('a' * 64, file_out)
+
+        self.assertEqual([x['digest'] for x in manifest],
+                [file_digest(x) for x in file_out])
+        self.assertEqual(self.cache.load_manifest('a' * 64), manifest)
+
+        shutil.rmtree(os.path.join(self.tmp, 'out'))
+        self.assertTrue(self.cache.restore('a' * 64, file_out))
+        self.assertEqual(read_file(file_out[0]), b'first')
+        self.assertEqual(read_file(file_out[1]), b'second')
+        self.assertEqual(os.stat(file_out[1]).st_mode & 0o777, 0o755)
+
+
+    def test_same_content_stored_once(self):
+        file_out = self.outputs(b'same', b'same')
+        self.cache.store('a' * 64, file_out)
+        self.cache.store('b' * 64, file_out[:1])
+        self.assertEqual(self.cache.stats()['objects'], 1)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+
+    def test_restore_missing(self):
+        file_out = self.outputs(b'content')
+        self.assertFalse(self.cache.restore('a' * 64, file_out))
+
+        manifest = self.cache.store('a' * 64, file_out)
+        # other number of outputs
+        self.assertFalse(self.cache.restore('a' * 64, file_out * 2))
+
+        os.unlink(self.cache.path('cas', manifest[0]['digest']))
+        self.assertFalse(self.cache.restore('a' * 64, file_out))
+
+
+    def test_restore_hardlink(self):
+        cache = ArtifactCache(self.cache.root, hardlink=True)
+        file_out = self.outputs(b'content')
+        manifest = cache.store('a' * 64, file_out)
+        os.unlink(file_out[0])
+
+        self.assertTrue(cache.restore('a' * 64, file_out))
+        self.assertTrue(os.path.samefile(file_out[0],
+                cache.path('cas', manifest[0]['digest'])))
+
+
+    def test_gc_removes_least_recently_used(self):
+        old = self.outputs(b'x' * 100)
+        self.cache.store('a' * 64, old)
+        past = time() - 3600
+        for _, filename, _ in self.cache._iter_files():
+            os.utime(filename, (past, past))
+
+        new = self.outputs(b'y' * 100, b'z' * 100)
+        self.cache.store('b' * 64, new)
+        size = self.cache.stats()['size']
+
+        removed, freed = self.cache.gc(size - 100)
+        self.assertEqual(removed, 2)
+        self.assertGreaterEqual(freed, 100)
+        self.assertIsNone(self.cache.load_manifest('a' * 64))
+        self.assertTrue(self.cache.restore('b' * 64, new))
+
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size(None, 10), 10)
+        self.assertEqual(parse_size(123), 123)
+        self.assertEqual(parse_size('512'), 512)
+        self.assertEqual(parse_size('2k'), 2048)
+        self.assertEqual(parse_size('1.5MB'), 3 << 19)
+        self.assertEqual(parse_size('5G'), 5 << 30)
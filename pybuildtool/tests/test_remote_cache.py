@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+#-
+from pybuildtool.core.artifact_cache import ArtifactCache, file_digest
+from pybuildtool.core.remote_cache import RemoteArtifactCache
+from pybuildtool.misc.cache_server import CacheServer
+
+
+def write_file(filename, data):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'wb') as f:
+        f.write(data)
+
+
+def read_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+class RemoteArtifactCacheTest(unittest.TestCase):
+
+    server = None
+    thread = None
+    tmp = None
+    url = None
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.server = CacheServer(('127.0.0.1', 0),
+                os.path.join(self.tmp, 'server'))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%i/' % self.server.server_port
+
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.tmp)
+
+
+    def remote_cache(self, name, **kwargs):
+        local = ArtifactCache(os.path.join(self.tmp, name))
+        cache = RemoteArtifactCache(local, self.url, **kwargs)
+        self.addCleanup(cache.pool.close)
+        return cache
+
+
+    def outputs(self, name, *contents):
+        files = []
+        for ii, data in enumerate(contents):
+            filename = os.path.join(self.tmp, name, 'file%i' % ii)
+            write_file(filename, data)
+            files.append(filename)
+        return files
+
+
+    def round_trip(self, **kwargs):
+        file_out = self.outputs('out', b'first' * 100, b'second')
+        self.remote_cache('local1', **kwargs).store('a' * 64, file_out)
+
+        # another checkout, with an empty local cache
+        other = self.remote_cache('local2', **kwargs)
+        shutil.rmtree(os.path.join(self.tmp, 'out'))
+        self.assertTrue(other.restore('a' * 64, file_out))
+        self.assertEqual(read_file(file_out[0]), b'first' * 100)
+        self.assertEqual(read_file(file_out[1]), b'second')
+        self.assertIsNotNone(other.local.load_manifest('a' * 64))
+
+
+    def test_round_trip(self):
+        self.round_trip()
+
+        # stored as they are, bazel-remote checks the hash of the bodies
+        digest = file_digest(os.path.join(self.tmp, 'out', 'file0'))
+        stored = os.path.join(self.tmp, 'server', 'cas', digest[:2], digest)
+        self.assertEqual(read_file(stored), b'first' * 100)
+
+
+    def test_round_trip_compressed(self):
+        for compression in ('zlib', 'lzma', 'bz2'):
+            with self.subTest(compression=compression):
+                self.round_trip(compression=compression)
+
+
+    def test_default_uncompressed(self):
+        cache = self.remote_cache('local')
+        self.assertEqual(cache.encoding, 'identity')
+        self.assertIsNone(cache.compress)
+
+
+    def test_read_only(self):
+        file_out = self.outputs('out', b'content')
+        self.remote_cache('local1', read_only=True).store('a' * 64, file_out)
+
+        other = self.remote_cache('local2')
+        self.assertFalse(other.restore('a' * 64, file_out))
+
+
+    def test_corrupted_object(self):
+        file_out = self.outputs('out', b'content')
+        self.remote_cache('local1').store('a' * 64, file_out)
+        digest = file_digest(file_out[0])
+        write_file(os.path.join(self.tmp, 'server', 'cas', digest[:2],
+                digest), b'something else')
+
+        other = self.remote_cache('local2')
+        self.assertFalse(other.restore('a' * 64, file_out))
+        self.assertIsNone(other.local.load_manifest('a' * 64))
+
+
+    def test_server_down(self):
+        file_out = self.outputs('out', b'content')
+        cache = self.remote_cache('local')
+        self.server.shutdown()
+        self.server.server_close()
+
+        # outputs are still kept in the local cache
+        self.assertEqual(len(cache.store('a' * 64, file_out)), 1)
+        self.assertTrue(cache.restore('a' * 64, file_out))
+        self.assertFalse(cache.restore('b' * 64, file_out))
@@ -35,7 +35,7 @@ class Task(BaseTask):
         conf = self.conf
 
         for mod in make_list(conf.get('transform_module')):
-            args.append("--transform '%s'" % mod)
+            args.extend(['--transform', mod])
 
 
     def perform(self):
@@ -43,13 +43,8 @@ class Task(BaseTask):
             self.bld.fatal('%s only have one output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} -o {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                '-o', self.file_out[0]])
 
 
 def configure(conf):
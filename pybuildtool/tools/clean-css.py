@@ -38,6 +38,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.css$', '.min.css'),),
     }
@@ -97,6 +98,31 @@ class Task(BaseTask):
         if cfg.get('debug', False):
             args.append('--debug')
 
+        if not any(cfg.get(x) for x in ('skip-advanced',
+                'skip-aggressive-merging', 'rounding-precision', 'timeout',
+                'debug')):
+            self.node_options = self.make_node_options()
+
+
+    def make_node_options(self):
+        cfg = self.conf
+        options = {}
+        if cfg.get('keep-line-breaks', False):
+            options['format'] = 'keep-breaks'
+        if cfg.get('no-comments', False):
+            options['level'] = {1: {'specialComments': 0}}
+        elif cfg.get('first-special-comment', False):
+            options['level'] = {1: {'specialComments': 1}}
+        if cfg.get('root-path', None):
+            options['rebaseTo'] = cfg['root-path']
+        if cfg.get('skip-import', False):
+            options['inline'] = ['none']
+        if cfg.get('skip_rebase', False):
+            options['rebase'] = False
+        if cfg.get('compatibility', None):
+            options['compatibility'] = cfg['compatibility']
+        return options
+
 
     def perform(self):
         if len(self.file_in) != 1:
@@ -112,14 +138,13 @@ class Task(BaseTask):
                 self.bld.fatal('cannot copy file to ' + self.file_out[0])
             return -1
 
+        ret = self.exec_node(self.file_in[0], self.file_out[0])
+        if ret is not None:
+            return ret
+
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} -o {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                '-o', self.file_out[0]])
 
 
 def configure(conf):
@@ -0,0 +1,125 @@
+"""
+Compress files with python compression modules, many files in a task.
+
+The files can be compressed by a thread pool.  Every output is written,
+waf and the rules using it expect it.  With `min_ratio`, the outputs which
+wouldn't be small enough are written empty instead.  That suits servers
+which skip empty precompressed files, for example Apache with
+`RewriteCond %{REQUEST_FILENAME}.gz -s`, or upload scripts ignoring empty
+files.  nginx `gzip_static` serves them as they are, don't set `min_ratio`
+for it.  Gzip outputs don't record the time or file name, they're the same
+for the same input.
+
+The output must be a directory, name the files with `_replace_patterns_`,
+for example: [['$', '.gz']].
+
+Options:
+
+    * algorithm : str, gzip
+                : One of gzip, zlib, bz2, xz.
+
+    * level     : int, None
+                : Compression level, the best compression by default
+                : (preset 6 for xz).
+
+    * min_ratio : float, None
+                : Write an empty output if the compressed data isn't smaller
+                : than this ratio of the input size, for example 0.9.
+
+    * workers   : int, 1
+                : Number of threads of a task, waf already runs many tasks
+                : at the same time.
+
+"""
+import bz2
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import lzma
+import os
+import zlib
+from pybuildtool import BaseTask
+from pybuildtool.misc.copy_utils import temp_filename
+
+tool_name = __name__
+
+# algorithm -> (compress(data, level), default level)
+ALGORITHMS = {
+    'gzip': (lambda data, level: gzip.compress(data, level, mtime=0), 9),
+    'zlib': (zlib.compress, 9),
+    'bz2': (bz2.compress, 9),
+    'xz': (lambda data, level: lzma.compress(data, preset=level), 6),
+}
+
+
+def compress_file(src, dst, algorithm='gzip', level=None, min_ratio=None):
+    """Compress `src` into `dst`, written under temporary name.
+
+    With `min_ratio`, `dst` is empty if the compressed data wasn't smaller
+    than that ratio of the input size.  Returns False if it's empty.
+    """
+    compress, default_level = ALGORITHMS[algorithm]
+    if level is None:
+        level = default_level
+
+    with open(src, 'rb') as f:
+        data = f.read()
+    compressed = compress(data, level)
+    written = min_ratio is None or len(compressed) < len(data) * min_ratio
+    if not written:
+        compressed = b''
+
+    temp = temp_filename(dst)
+    try:
+        with open(temp, 'wb') as f:
+            f.write(compressed)
+        os.replace(temp, dst)
+    finally:
+        if os.path.exists(temp):
+            os.unlink(temp)
+    return written
+
+
+class Task(BaseTask):
+
+    batch_size = 64
+    cacheable = True
+    name = tool_name
+    algorithm = None
+    level = None
+    min_ratio = None
+    workers = None
+
+    def prepare(self):
+        cfg = self.conf
+
+        self.algorithm = cfg.get('algorithm', 'gzip')
+        if self.algorithm not in ALGORITHMS:
+            self.bld.fatal('%s: unknown algorithm %s, use one of: %s' % (
+                    tool_name.capitalize(), self.algorithm,
+                    ', '.join(sorted(ALGORITHMS))))
+
+        self.level = cfg.get('level')
+        if cfg.get('min_ratio') is not None:
+            self.min_ratio = float(cfg['min_ratio'])
+        self.workers = cfg.get('workers') or 1
+
+
+    def perform(self):
+        if not self.file_in or len(self.file_in) != len(self.file_out):
+            self.bld.fatal('%s needs an output for every input' %\
+                    tool_name.capitalize())
+
+        def run(pair):
+            compress_file(pair[0], pair[1], self.algorithm, self.level,
+                    self.min_ratio)
+
+        pairs = list(zip(self.file_in, self.file_out))
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.workers,
+                    len(pairs))) as executor:
+
+                list(executor.map(run, pairs))
+        except OSError as e:
+            self.bld.to_log('%s: %s\n' % (tool_name.capitalize(), e))
+            return 1
+        return 0
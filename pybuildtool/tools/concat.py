@@ -1,37 +1,219 @@
 """ Merge files from sources into copious targets.
+
+The output is only replaced if its content changed.
+
+Options:
+
+    * separator  : str, None
+                 : Written between the files, for example ";\\n" for
+                 : javascript.
+
+    * source_map : bool, False
+                 : Create source map (version 3) next to the output, with
+                 : ".map" suffix, and add its reference at the end of
+                 : javascript and css outputs.  Each file starts on a new
+                 : line.  The source map can be declared in `extra_out`.
 """
+import hashlib
+import json
 import os
-from shutil import copyfileobj
 from pybuildtool import BaseTask
-from pybuildtool.misc.resource import get_filehash
+from pybuildtool.misc.copy_utils import copy_fd, temp_filename
+from pybuildtool.misc.hash_cache import CHUNK_SIZE, get_filehash,\
+        get_hash_cache
 
 tool_name = __name__
 
+VLQ_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def vlq_encode(value):
+    """Base64 VLQ as used by source maps."""
+    if value < 0:
+        value = (-value << 1) | 1
+    else:
+        value <<= 1
+    result = ''
+    while True:
+        digit = value & 31
+        value >>= 5
+        if value:
+            digit |= 32
+        result += VLQ_CHARS[digit]
+        if not value:
+            return result
+
+
+class SourceMap():
+    """Maps every line of the output to the line of its source file."""
+
+    mappings = None
+    sources = None
+
+    _last_source = 0
+    _last_line = 0
+
+    def __init__(self):
+        self.mappings = []
+        self.sources = []
+
+
+    def add_source(self, filename, lines):
+        index = len(self.sources)
+        self.sources.append(filename)
+        for line in range(lines):
+            # generated column, source index, source line, source column
+            self.mappings.append('A' + vlq_encode(index - self._last_source) +\
+                    vlq_encode(line - self._last_line) + 'A')
+            self._last_source = index
+            self._last_line = line
+
+
+    def add_unmapped(self, lines):
+        self.mappings.extend([''] * lines)
+
+
+    def dumps(self, output, map_dir):
+        return json.dumps({
+            'version': 3,
+            'file': os.path.basename(output),
+            'sources': [os.path.relpath(x, map_dir) for x in self.sources],
+            'names': [],
+            'mappings': ';'.join(self.mappings),
+        })
+
+
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_source_grouped_': True,
         '_noop_retcodes_': 666,
     }
     name = tool_name
+    separator = None
+    source_map = False
+
+    def prepare(self):
+        cfg = self.conf
+
+        separator = cfg.get('separator')
+        if separator:
+            self.separator = separator.encode()
+        else:
+            self.separator = b''
+        self.source_map = cfg.get('source_map', False)
+
+
+    def is_cacheable(self):
+        # the source map is not one of the outputs restored from the cache
+        return not self.conf.get('source_map', False) and\
+                super().is_cacheable()
+
+
+    def _write_hashed(self, dest, hasher, source_map):
+        """Write sources into `dest` while hashing the content."""
+        buf = bytearray(CHUNK_SIZE)
+        view = memoryview(buf)
+
+        def write(data):
+            dest.write(data)
+            hasher.update(data)
+
+        for index, src_name in enumerate(self.file_in):
+            if index and self.separator:
+                write(self.separator)
+                if source_map is not None:
+                    if not self.separator.endswith(b'\n'):
+                        write(b'\n')
+                    source_map.add_unmapped(self.separator.count(b'\n') +\
+                            (not self.separator.endswith(b'\n')))
+
+            lines = 0
+            last = b'\n'
+            with open(src_name, 'rb', buffering=0) as src:
+                while True:
+                    size = src.readinto(buf)
+                    if not size:
+                        break
+                    write(view[:size])
+                    lines += buf.count(b'\n', 0, size)
+                    last = buf[size - 1:size]
+
+            if source_map is not None:
+                if last != b'\n':
+                    write(b'\n')
+                    lines += 1
+                source_map.add_source(src_name, lines)
+
+
+    def _write_copied(self, dest):
+        """Write sources into `dest`, inside the kernel if possible."""
+        for index, src_name in enumerate(self.file_in):
+            if index and self.separator:
+                dest.write(self.separator)
+            with open(src_name, 'rb', buffering=0) as src:
+                copy_fd(src.fileno(), dest.fileno())
+
+
+    def _source_map_reference(self, output): # pylint:disable=no-self-use
+        basename = os.path.basename(output) + '.map'
+        ext = os.path.splitext(output)[1]
+        if ext == '.js':
+            return ('//# sourceMappingURL=%s\n' % basename).encode()
+        if ext == '.css':
+            return ('/*# sourceMappingURL=%s */\n' % basename).encode()
+        return b''
+
+
+    def _write_source_map(self, output, source_map): # pylint:disable=no-self-use
+        map_name = output + '.map'
+        temp = temp_filename(map_name)
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(source_map.dumps(output, os.path.dirname(map_name)))
+        os.replace(temp, map_name)
+
 
     def perform(self):
         if len(self.file_out) != 1:
             self.bld.fatal('%s can only have one output' %\
                     tool_name.capitalize())
 
-        if os.path.isdir(self.file_out[0]):
+        output = self.file_out[0]
+        if os.path.isdir(output):
             self.bld.fatal('cannot concat to a directory')
 
+        hash_cache = get_hash_cache(self.bld)
+        temp = temp_filename(output)
         try:
-            before_hash = get_filehash(self.file_out[0])
-            with open(self.file_out[0], 'wb') as dest:
-                for src_name in self.file_in:
-                    with open(src_name, 'rb') as src:
-                        copyfileobj(src, dest)
+            # nothing to compare with, let the kernel copy the files
+            if not (self.source_map or os.path.exists(output)):
+                with open(temp, 'wb', buffering=0) as dest:
+                    self._write_copied(dest)
+                os.replace(temp, output)
+                return 0
+
+            hasher = hashlib.new(hash_cache.algorithm)
+            if self.source_map:
+                source_map = SourceMap()
+            else:
+                source_map = None
+            with open(temp, 'wb') as dest:
+                self._write_hashed(dest, hasher, source_map)
+                if source_map is not None:
+                    reference = self._source_map_reference(output)
+                    dest.write(reference)
+                    hasher.update(reference)
 
-            if before_hash == get_filehash(self.file_out[0]):
+            if hasher.digest() == get_filehash(output, self.bld) and\
+                    (source_map is None or os.path.exists(output + '.map')):
                 return 666
+            if source_map is not None:
+                self._write_source_map(output, source_map)
+            os.replace(temp, output)
             return 0
         except OSError:
             return 1
+        finally:
+            if os.path.exists(temp):
+                os.unlink(temp)
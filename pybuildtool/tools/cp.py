@@ -1,35 +1,68 @@
 """ Copy files.
+
+Files which were already copied are skipped, if all of them were the task
+pretends nothing happened.
+
+Options:
+
+    * hardlink      : bool, False
+                    : Create hardlinks instead of copies, the copies must not
+                    : be modified afterward.
+
+    * preserve_mode : bool, False
+                    : Copy permission bits.
+
+    * workers       : int, 1
+                    : Number of threads of a task, waf already runs many
+                    : tasks at the same time.
+
 """
-from shutil import copyfile, Error
+import os
 from pybuildtool import BaseTask
-from pybuildtool.misc.resource import get_filehash
+from pybuildtool.misc.copy_utils import copy_files
 
 tool_name = __name__
 
 class Task(BaseTask):
 
+    batch_size = 64
+    cacheable = True
     conf = {
         '_noop_retcodes_': 666,
     }
     name = tool_name
+    hardlink = None
+    preserve_mode = None
+    workers = None
+
+    def prepare(self):
+        cfg = self.conf
+
+        self.hardlink = cfg.get('hardlink', False)
+        self.preserve_mode = cfg.get('preserve_mode', False)
+        self.workers = cfg.get('workers') or 1
+
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input, got %s' % (
+        if not self.file_in:
+            self.bld.fatal('%s needs input, got %s' % (
                     tool_name.capitalize(), repr(self.file_in)))
 
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s can only have one output, got %s' % (
+        if len(self.file_in) != len(self.file_out):
+            self.bld.fatal('%s needs an output for every input, got %s' % (
                     tool_name.capitalize(), repr(self.file_out)))
 
+        pairs = list(zip(self.file_in, self.file_out))
+        for src, dst in pairs:
+            if os.path.realpath(src) == os.path.realpath(dst):
+                self.bld.fatal('tried to copy file to itself')
+
         try:
-            source_hash = get_filehash(self.file_in[0])
-            if source_hash and source_hash == get_filehash(self.file_out[0]):
-                return 666
-            copyfile(self.file_in[0], self.file_out[0])
-            return 0
-        except Error:
-            self.bld.fatal('tried to copy file to itself')
-        except IOError:
+            copied = copy_files(pairs, workers=self.workers,
+                    hardlink=self.hardlink, preserve_mode=self.preserve_mode,
+                    bld=self.bld)
+        except OSError:
             self.bld.fatal('destination location cannot be written')
-        return 1
+        if not copied:
+            return 666
+        return 0
@@ -225,7 +225,7 @@ class Task(BaseTask):
 
         # Search directory for include files
         for path in make_list(cfg.get('include_path')):
-            args.append('-I ' + expand_resource(self.group, path))
+            args.extend(['-I', expand_resource(self.group, path)])
 
         # Include
         for path in make_list(cfg.get('include')):
@@ -233,7 +233,7 @@ class Task(BaseTask):
 
         # Exclude
         for path in make_list(cfg.get('exclude')):
-            args.append('-i ' + expand_resource(self.group, path))
+            args.extend(['-i', expand_resource(self.group, path)])
 
         # Inconclusive, allow false positives
         c = cfg.get('inconclusive')
@@ -248,12 +248,12 @@ class Task(BaseTask):
         # Parallel
         c = cfg.get('jobs')
         if c:
-            args.append('-j %i' % c)
+            args.extend(['-j', '%i' % c])
 
         # Max processor usage
         c = cfg.get('load_average')
         if c:
-            args.append('-l %f' % c)
+            args.extend(['-l', '%f' % c])
 
         # Programming language
         c = cfg.get('proglang')
@@ -293,7 +293,7 @@ class Task(BaseTask):
         # Rule
         c = cfg.get('rule')
         if c:
-            args.append("--rule='%s'" % c)
+            args.append('--rule=%s' % c)
 
         # Rule file
         c = cfg.get('rule_file')
@@ -317,7 +317,7 @@ class Task(BaseTask):
         # Template
         c = cfg.get('template')
         if c:
-            args.append("--template='%s'" % c)
+            args.append('--template=%s' % c)
 
         # Verbose
         c = cfg.get('verbose')
@@ -344,13 +344,8 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ),
-            **kwargs)
+        return self.exec_argv([executable] + self.args + self.file_in,
+                **kwargs)
 
 
 def configure(conf):
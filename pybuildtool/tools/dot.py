@@ -124,6 +124,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     name = tool_name
     workdir = None
 
@@ -224,7 +225,7 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command([executable, '-o' + self.file_out[0]] +\
+        return self.exec_argv([executable, '-o' + self.file_out[0]] +\
                 self.args + self.file_in, **kwargs)
 
 
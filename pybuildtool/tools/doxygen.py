@@ -49,12 +49,7 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-            ),
-            **kwargs)
+        return self.exec_argv([executable] + self.args, **kwargs)
 
 
 def configure(conf):
@@ -174,11 +174,7 @@ class Task(BaseTask):
             self.bld.fatal('%s produces no output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-            ))
+        return self.exec_argv([executable] + self.args)
 
 
 def configure(conf):
@@ -12,6 +12,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'$', '.gz'),),
     }
@@ -29,13 +30,8 @@ class Task(BaseTask):
                     tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} > {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0]],
+                stdout=self.file_out[0])
 
 
 def configure(conf):
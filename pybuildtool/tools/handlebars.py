@@ -37,6 +37,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.handlebars$', '.js'),),
     }
@@ -56,10 +57,10 @@ class Task(BaseTask):
 
         c = cfg.get('handlebarpath')
         if c:
-            args.append("--handlebarPath='%s'" % c)
+            args.append('--handlebarPath=%s' % c)
 
         for handler in make_list(cfg.get('known')):
-            args.append("--known='%s'" % handler)
+            args.append('--known=%s' % handler)
 
         c = cfg.get('known_only')
         if c:
@@ -71,7 +72,7 @@ class Task(BaseTask):
 
         c = cfg.get('namespace')
         if c:
-            args.append("--namespace='%s'" % c)
+            args.append('--namespace=%s' % c)
 
         c = cfg.get('simple')
         if c:
@@ -79,7 +80,7 @@ class Task(BaseTask):
 
         c = cfg.get('root')
         if c:
-            args.append("--root='%s'" % c)
+            args.append('--root=%s' % c)
 
         c = cfg.get('partial')
         if c:
@@ -87,32 +88,40 @@ class Task(BaseTask):
 
         c = cfg.get('data')
         if c:
-            args.append("--data='%s'" % json_dump(c))
+            args.append('--data=%s' % json_dump(c))
 
         c = cfg.get('extension')
         if c:
-            args.append("--extension='%s'" % c)
+            args.append('--extension=%s' % c)
 
         c = cfg.get('bom')
         if c:
             args.append('--bom')
 
+        if not any(cfg.get(x) for x in ('amd', 'commonjs', 'handlebarpath',
+                'minimize', 'namespace', 'root', 'partial', 'data',
+                'extension', 'bom')):
+
+            self.node_options = {
+                'knownHelpers': dict((x, True) for x in\
+                        make_list(cfg.get('known'))),
+                'knownHelpersOnly': bool(cfg.get('known_only')),
+                'simple': bool(cfg.get('simple')),
+            }
+
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s can only have one output' %\
-                    tool_name.capitalize())
+        return self.run_batch(self.convert)
+
+
+    def convert(self, file_in, file_out):
+        ret = self.exec_node(file_in, file_out)
+        if ret is not None:
+            return ret
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} -f {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [file_in, '-f',
+                file_out])
 
 
 def configure(conf):
@@ -50,12 +50,8 @@ class Task(BaseTask):
     def perform(self):
         executable = self.env['%s_BIN' % tool_name.upper()]
         for file_in in self.file_in:
-            return_code = self.exec_command(
-                '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=file_in,
-            ))
+            return_code = self.exec_argv([executable] + self.args +\
+                    [file_in])
             if return_code:
                 print('Found syntax errors in %s\n' % file_in)
                 return 1
@@ -21,6 +21,7 @@ Requirements:
       to install, run `pip install jinja2`
 
 """
+from copy import deepcopy
 from typing import Mapping, Sequence
 from json import load as json_load
 import os
@@ -52,6 +53,7 @@ class Task(BaseTask):
 
     def prepare(self):
         cfg = self.conf
+        self.context = {}
 
         # Change current directory
         c = make_list(cfg.get('search_dir'))
@@ -97,7 +99,9 @@ class Task(BaseTask):
                 mod = load_module_from_filename(python_file, filebase)
             dict_merge(self.context, mod.export)
 
-        dict_merge(self.context, cfg.get('context', {}))
+        # configuration is shared with other tasks, don't let dict_merge()
+        # extend its lists
+        dict_merge(self.context, deepcopy(cfg.get('context', {})))
 
 
     def perform(self):
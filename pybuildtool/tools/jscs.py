@@ -45,7 +45,7 @@ class Task(BaseTask):
         # Custom configuration file
         c = cfg.get('config_file', None)
         if c:
-            args.append("--config='%s'" % bld.path.find_resource(c).abspath())
+            args.append('--config=%s' % bld.path.find_resource(c).abspath())
 
         c = cfg.get('esnext', False)
         if c:
@@ -53,7 +53,7 @@ class Task(BaseTask):
 
         c = cfg.get('esprima', None)
         if c:
-            args.append("--esprima='%s'" % bld.path.find_resource(c).abspath())
+            args.append('--esprima=%s' % bld.path.find_resource(c).abspath())
 
         c = cfg.get('colors', True)
         if not c:
@@ -61,7 +61,7 @@ class Task(BaseTask):
 
         c = cfg.get('preset', None)
         if c:
-            args.append("--preset='%s'" % c)
+            args.append('--preset=%s' % c)
 
         c = cfg.get('verbose', False)
         if c:
@@ -69,11 +69,11 @@ class Task(BaseTask):
 
         c = cfg.get('max_errors', 0)
         if c > 0:
-            args.append("--max-errors='%s'" % c)
+            args.append('--max-errors=%s' % c)
 
         c = cfg.get('error_filter', None)
         if c:
-            args.append("--error-filter='%s'" % c)
+            args.append('--error-filter=%s' % c)
 
         if cfg.get('reporter', None):
             args.append('--reporter=%s' % cfg['reporter'])
@@ -81,12 +81,7 @@ class Task(BaseTask):
 
     def perform(self):
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=' '.join(self.file_in),
-        ))
+        return self.exec_argv([executable] + self.args + self.file_in)
 
 
 def configure(conf):
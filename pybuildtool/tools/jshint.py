@@ -35,7 +35,7 @@ class Task(BaseTask):
 
         # Custom configuration file
         if cfg.get('config_file', None):
-            args.append("--config='%s'" % bld.path.find_resource(
+            args.append('--config=%s' % bld.path.find_resource(
                 cfg['config_file']).abspath())
 
         # Custom reporter (<PATH>|jslint|checkstyle)
@@ -50,18 +50,13 @@ class Task(BaseTask):
 
         # Pass in custom jshintignore file path
         if cfg.get('ignore_list_file', None):
-            args.append("--exclude-path='%s'" % bld.path.find_resource(
+            args.append('--exclude-path=%s' % bld.path.find_resource(
                 cfg['ignore_list_file']).abspath())
 
 
     def perform(self):
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=' '.join(self.file_in),
-        ))
+        return self.exec_argv([executable] + self.args + self.file_in)
 
 
 def configure(conf):
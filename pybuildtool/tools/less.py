@@ -23,6 +23,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.less$', '.css'),)
     }
@@ -35,22 +36,21 @@ class Task(BaseTask):
         # keep line breaks
         if cfg.get('keep_line_breaks', False):
             args.append('--keep-line-breaks')
+        else:
+            self.node_options = {}
 
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s only have one output' % tool_name.capitalize())
+        return self.run_batch(self.convert)
+
+
+    def convert(self, file_in, file_out):
+        ret = self.exec_node(file_in, file_out)
+        if ret is not None:
+            return ret
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [file_in, file_out])
 
 
 def configure(conf):
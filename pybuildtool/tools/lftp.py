@@ -39,12 +39,12 @@ class Task(BaseTask):
                 authstr = '%s,%s' % (u, p)
             else:
                 authstr = u
-            args.append('-u %s' % authstr)
+            args.extend(['-u', authstr])
 
         # port
         c = cfg.get('port', None)
         if c:
-            args.append('-p %s' % c)
+            args.extend(['-p', str(c)])
 
         # host
         c = cfg.get('host', None)
@@ -62,14 +62,9 @@ class Task(BaseTask):
             self.bld.fatal('%s only have one output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            "{exe} {arg} -e 'put {in_} -o {out}' {hst}".format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-            hst=self.hoststr,
-        ))
+        return self.exec_argv([executable] + self.args + ['-e',
+                'put %s -o %s' % (self.file_in[0], self.file_out[0]),
+                self.hoststr])
 
 
 def configure(conf):
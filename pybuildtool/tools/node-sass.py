@@ -62,18 +62,24 @@ Requirements:
 
 """
 import os
-from pybuildtool import BaseTask, expand_resource
+from pybuildtool import BaseTask, expand_resource, make_list
 
 tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     name = tool_name
     conf = {
         '_replace_patterns_': ((r'\.scss$', '.css'),)
     }
     workdir = None
 
+    def is_cacheable(self):
+        # the source map is not one of the outputs restored from the cache
+        return not self.conf.get('source_map') and super().is_cacheable()
+
+
     def prepare(self):
         cfg = self.conf
 
@@ -94,6 +100,31 @@ class Task(BaseTask):
         self.add_str_args('output_style', 'indent_type', 'linefeed',
                 'source_map')
 
+        if not any(cfg.get(x) for x in ('source_map', 'source_map_root',
+                'source_map_contents', 'source_map_embed', 'importer',
+                'functions', 'follow')):
+
+            self.node_options = self.make_node_options()
+
+
+    def make_node_options(self):
+        cfg = self.conf
+        options = {
+            'includePaths': [expand_resource(self.group, x) for x in\
+                    make_list(cfg.get('include_path'))],
+        }
+        for option, name in (('omit_source_map_url', 'omitSourceMapUrl'),
+                ('indented_syntax', 'indentedSyntax'),
+                ('source_comments', 'sourceComments'),
+                ('indent_width', 'indentWidth'), ('precision', 'precision'),
+                ('output_style', 'outputStyle'),
+                ('indent_type', 'indentType'), ('linefeed', 'linefeed')):
+
+            value = cfg.get(option)
+            if value is not None:
+                options[name] = value
+        return options
+
 
     def perform(self):
         if len(self.file_in) != 1:
@@ -108,15 +139,14 @@ class Task(BaseTask):
         if self.workdir is not None:
             kwargs['cwd'] = self.workdir
 
+        ret = self.exec_node(self.file_in[0], self.file_out[0],
+                cwd=self.workdir)
+        if ret is not None:
+            return ret
+
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} < {in_} > {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ),
-        **kwargs)
+        return self.exec_argv([executable] + self.args, stdin=self.file_in[0],
+                stdout=self.file_out[0], **kwargs)
 
 
 def configure(conf):
@@ -187,7 +187,7 @@ class Task(BaseTask):
     def perform(self):
         executable = self.env['%s_BIN' % tool_name.upper()]
         cmds = [executable, 'restore'] + self.args + self.file_in
-        return self.exec_command(cmds)
+        return self.exec_argv(cmds)
 
 
 def configure(conf):
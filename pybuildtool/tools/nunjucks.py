@@ -33,6 +33,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.html', '.js'),),
     }
@@ -49,20 +50,25 @@ class Task(BaseTask):
 
         c = make_list(cfg.get('filters'))
         if c:
-            args.append('--filters="%s"' % ','.join(c))
+            args.append('--filters=%s' % ','.join(c))
 
         c_basedir = cfg.get('basedir', None)
         c = cfg.get('name', None)
         if c and c_basedir is not None:
-            args.append('--name="%s"' % c)
+            args.append('--name=%s' % c)
 
         c = make_list(cfg.get('include'))
         for o in c:
-            args.append('--include="%s"' % expand_resource(self.group, o))
+            args.append('--include=%s' % expand_resource(self.group, o))
 
         c = make_list(cfg.get('exclude'))
         for o in c:
-            args.append('--exclude="%s"' % expand_resource(self.group, o))
+            args.append('--exclude=%s' % expand_resource(self.group, o))
+
+        if not any(cfg.get(x) for x in ('force', 'include', 'exclude')):
+            self.node_options = {
+                'asyncFilters': make_list(cfg.get('filters')),
+            }
 
 
     def perform(self):
@@ -80,16 +86,17 @@ class Task(BaseTask):
                 name = file_in[len(basedir) + 1:]
             else:
                 name = os.path.basename(file_in)
-            self.args.append('--name="%s"' % name)
+            self.args.append('--name=%s' % name)
+            if self.node_options is not None:
+                self.node_options['name'] = name
+
+        ret = self.exec_node(self.file_in[0], self.file_out[0])
+        if ret is not None:
+            return ret
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} > {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0]
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0]],
+                stdout=self.file_out[0])
 
 
 def configure(conf):
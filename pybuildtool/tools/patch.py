@@ -26,7 +26,7 @@ class Task(BaseTask):
 
         if cfg.get('patch_file') is None:
             self.bld.fatal('InvalidOptions: "patch_file" is missing')
-        args.append('-i ' + os.path.realpath(cfg['patch_file']))
+        args.extend(['-i', os.path.realpath(cfg['patch_file'])])
 
 
     def perform(self):
@@ -37,13 +37,8 @@ class Task(BaseTask):
                     tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} -o {out} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + ['-o',
+                self.file_out[0], self.file_in[0]])
 
 
 def configure(conf):
@@ -1,8 +1,21 @@
 """
 pngcrush is a png compressor
 
+The images of a task get the fast trials from a single pngcrush, images of
+at least `brute_min_size` bytes then get brute-force trials within the time
+`budget` from a pngcrush each, the smaller output is used.  Results are
+kept in '.pngcrush' of the build directory by the content of the image and
+the options, an image is only crushed once.  The bytes saved and the time
+spent for every image are written to the log, their total is shown at the
+end of the build.
+
 Options:
 
+    * budget        : float, 10
+                      Seconds the brute-force trials of an image may take
+    * brute_min_size: int,   16384
+                      Images smaller than this only get the fast trials
+
     * already       : int,   None
                       Already_crushed_size [e.g., 8192]
     * bail          : bool,  False
@@ -12,7 +25,8 @@ Options:
     * blacken       : bool,  False
                       Zero samples underlying fully-transparent pixels
     * brute         : int,   148
-                      Use brute-force: try 138 different methods [11-148]
+                      Use brute-force: try 138 different methods [11-148],
+                      0 to only run the fast trials
     * color_type    : int,   None
                       Color_type of output file [0, 2, 4, or 6]
     * double_gamma  : bool,  False
@@ -94,18 +108,55 @@ Requirements:
       to install, for example run `apt-get install pngcrush`
 
 """
+from hashlib import sha256
+import json
+import os
+import shutil
+import tempfile
+import threading
+from time import time
+#-
+from waflib import Errors, Logs # pylint:disable=import-error
+#-
 from pybuildtool import BaseTask
+from pybuildtool.misc.copy_utils import clone_file, temp_filename
+from pybuildtool.misc.hash_cache import get_filehash
 
 tool_name = __name__
 
+# how much longer the brute-force trials take than the fast ones
+BRUTE_FACTOR = 15
+
+_stats_lock = threading.Lock()
+
+
+def _report(bld):
+    stats = bld._pngcrush_stats
+    size_in = sum(x[0] for x in stats)
+    size_out = sum(x[1] for x in stats)
+    Logs.info('pngcrush: %i images, %i bytes saved (%.1f%%), %.1fs', len(stats),
+            size_in - size_out, 100.0 * (size_in - size_out) / (size_in or 1),
+            sum(x[2] for x in stats))
+
+
 class Task(BaseTask):
 
+    batch_size = 32
+    cacheable = True
     name = tool_name
+    brute_args = None
+    brute_min_size = None
+    budget = None
+    cache_dir = None
 
     def prepare(self):
         cfg = self.conf
         args = self.args
 
+        self.budget = float(cfg.get('budget', 10))
+        self.brute_min_size = cfg.get('brute_min_size', 16384)
+        self.cache_dir = os.path.join(self.bld.out_dir, '.pngcrush')
+
         # already_crushed_size [e.g., 8192]
         if cfg.get('already', None):
             args.append('-already=%i' % cfg['already'])
@@ -123,7 +174,8 @@ class Task(BaseTask):
             args.append('-blacken')
 
         # use brute-force: try 138 different methods [11-148]
-        args.append('-brute=%i' % cfg.get('brute', 148))
+        if cfg.get('brute', 148):
+            self.brute_args = ['-brute=%i' % cfg.get('brute', 148)]
 
         # color_type of output file [0, 2, 4, or 6]
         if cfg.get('color_type', None):
@@ -159,7 +211,7 @@ class Task(BaseTask):
 
         # b[efore_IDAT]|a[fter_IDAT] "keyword"
         if cfg.get('itxt', None):
-            args.append('-itxt="%s"' % cfg['itxt'])
+            args.append('-itxt=%s' % cfg['itxt'])
 
         # chunk_name
         if cfg.get('keep', False):
@@ -211,7 +263,7 @@ class Task(BaseTask):
 
         # chunkname (or "alla" or "allb")
         if cfg.get('rem', None):
-            args.append('-rem="%s"' % cfg['rem'])
+            args.append('-rem=%s' % cfg['rem'])
 
         # gamma (float or fixed*100000) even if it is present
         if cfg.get('replace_gamma', None):
@@ -239,15 +291,15 @@ class Task(BaseTask):
 
         # b[efore_IDAT]|a[fter_IDAT] "keyword" "text"
         if cfg.get('text', None):
-            args.append('-text="%s"' % cfg['text'])
+            args.append('-text=%s' % cfg['text'])
 
         # trns_array: n trns[0] trns[1] .. trns[n-1]
         if cfg.get('trns_array', None):
-            args.append('-trns_array="%s"' % cfg['trns_array'])
+            args.append('-trns_array=%s' % cfg['trns_array'])
 
         # index red green blue gray
         if cfg.get('trns', None):
-            args.append('-trns="%s"' % cfg['trns'])
+            args.append('-trns=%s' % cfg['trns'])
 
         # compression_window_size [32, 16, 8, 4, 2, 1, 512]
         if cfg.get('window_size', None):
@@ -263,32 +315,157 @@ class Task(BaseTask):
 
         # b|a "keyword" "lcode" "tkey" "text"
         if cfg.get('zitxt', None):
-            args.append('-zitxt="%s"' % cfg['zitxt'])
+            args.append('-zitxt=%s' % cfg['zitxt'])
 
         # b[efore_IDAT]|a[fter_IDAT] "keywrod" "text"
         if cfg.get('ztxt', None):
-            args.append('-ztxt="%s"' % cfg['ztxt'])
+            args.append('-ztxt=%s' % cfg['ztxt'])
 
         # quiet
         if cfg.get('quiet', True):
             args.append('-q')
 
 
-    def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s can only have one output' %\
-                    tool_name.capitalize())
+    def cache_filename(self, file_in):
+        digest = get_filehash(file_in, self.bld)
+        if digest is None:
+            return None
+        key = json.dumps([digest.hex(), self.args, self.brute_args,
+                self.brute_min_size, self.budget])
+        return os.path.join(self.cache_dir,
+                sha256(key.encode()).hexdigest() + '.png')
 
+
+    def crush(self, file_in, file_out, extra_args=(), timeout=None):
+        """Run pngcrush, returns the seconds it took or None if it failed."""
+        executable = self.env['%s_BIN' % tool_name.upper()]
+        kwargs = {}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        started = time()
+        try:
+            ret = self.exec_argv([executable] + self.args + list(extra_args) +\
+                    [file_in, file_out], **kwargs)
+        except Errors.WafError:
+            # timed out
+            return None
+        if ret:
+            return None
+        # pngcrush doesn't write outputs which would be larger
+        if not os.path.exists(file_out):
+            clone_file(file_in, file_out)
+        return time() - started
+
+
+    def crush_many(self, files_in, out_dir):
+        """Run the fast trials of the images with a single pngcrush writing
+        into `out_dir`, returns the seconds it took or None if it failed."""
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        started = time()
+        if self.exec_argv([executable] + self.args + ['-d', out_dir] +\
+                list(files_in)):
+            return None
+        for file_in in files_in:
+            file_out = os.path.join(out_dir, os.path.basename(file_in))
+            if not os.path.exists(file_out):
+                clone_file(file_in, file_out)
+        return time() - started
+
+
+    def record(self, file_in, file_out, elapsed, method):
+        size_in = os.path.getsize(file_in)
+        size_out = os.path.getsize(file_out)
+        self.bld.to_log('pngcrush %s: %i -> %i bytes, %.2fs, %s\n' % (
+                file_out, size_in, size_out, elapsed, method))
+        with _stats_lock:
+            try:
+                stats = self.bld._pngcrush_stats
+            except AttributeError:
+                stats = self.bld._pngcrush_stats = []
+                self.bld.add_post_fun(_report)
+            stats.append((size_in, size_out, elapsed))
+
+
+    def finish(self, file_in, file_out, cache_filename, fast_out, elapsed):
+        """Escalate to the brute-force trials when they're expected to
+        finish within the budget, and keep the smaller result."""
+        method = 'fast'
+        best = fast_out
+        brute_out = temp_filename(file_out) + '.png'
+        try:
+            if self.brute_args and\
+                    os.path.getsize(file_in) >= self.brute_min_size and\
+                    elapsed * BRUTE_FACTOR <= self.budget:
+
+                brute_elapsed = self.crush(file_in, brute_out,
+                        self.brute_args, timeout=self.budget)
+                if brute_elapsed is not None:
+                    elapsed += brute_elapsed
+                    if os.path.getsize(brute_out) < os.path.getsize(fast_out):
+                        method = 'brute'
+                        best = brute_out
+            clone_file(best, file_out)
+        finally:
+            if os.path.exists(brute_out):
+                os.unlink(brute_out)
+
+        if cache_filename:
+            try:
+                clone_file(file_out, cache_filename)
+            except OSError:
+                pass
+        self.record(file_in, file_out, elapsed, method)
+        return 0
+
+
+    def perform(self):
+        pending = []
+        for file_in, file_out in self.batch_pairs():
+            started = time()
+            cache_filename = self.cache_filename(file_in)
+            if cache_filename and os.path.exists(cache_filename):
+                clone_file(cache_filename, file_out)
+                self.record(file_in, file_out, time() - started, 'cached')
+            else:
+                pending.append((file_in, file_out, cache_filename))
+        if not pending:
+            return 0
+
+        # `-d` names the outputs like the inputs, images with the same name
+        # go to another run
+        chunks = []
+        for item in pending:
+            name = os.path.basename(item[0])
+            for chunk in chunks:
+                if name not in chunk:
+                    chunk[name] = item
+                    break
+            else:
+                chunks.append({name: item})
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            jobs = []
+            for index, chunk in enumerate(chunks):
+                fast_dir = os.path.join(temp_dir, str(index))
+                os.mkdir(fast_dir)
+                elapsed = self.crush_many([x[0] for x in chunk.values()],
+                        fast_dir)
+                if elapsed is None:
+                    return 1
+
+                # the time of an image is estimated by its share of the size
+                total = sum(os.path.getsize(x[0]) for x in chunk.values())
+                for name, (file_in, file_out, cache_filename) in\
+                        chunk.items():
+
+                    share = os.path.getsize(file_in) / (total or 1)
+                    jobs.append((file_in, file_out, cache_filename,
+                            os.path.join(fast_dir, name), elapsed * share))
+            return self.run_batch(self.finish, jobs)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def configure(conf):
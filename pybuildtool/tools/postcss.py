@@ -45,14 +45,20 @@ Requirements:
 """
 
 import os
-from pybuildtool import BaseTask
+from pybuildtool import BaseTask, make_list
 
 tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     name = tool_name
 
+    def is_cacheable(self):
+        # the source map is not one of the outputs restored from the cache
+        return not self.conf.get('map') and super().is_cacheable()
+
+
     def prepare(self):
         self.add_bool_args('no_map', 'include_dotfiles')
 
@@ -62,6 +68,15 @@ class Task(BaseTask):
 
         self.add_str_args('env', 'parser', 'stringifier', 'syntax')
 
+        cfg = self.conf
+        if not any(cfg.get(x) for x in ('map', 'env', 'parser', 'stringifier',
+                'syntax')):
+
+            self.node_options = {
+                'use': make_list(cfg.get('use')),
+                'map': not cfg.get('no_map') and {'inline': True},
+            }
+
 
     def perform(self):
         if len(self.file_in) != 1:
@@ -69,14 +84,13 @@ class Task(BaseTask):
         if len(self.file_out) != 1:
             self.bld.fatal('%s only have one output' % tool_name.capitalize())
 
+        ret = self.exec_node(self.file_in[0], self.file_out[0])
+        if ret is not None:
+            return ret
+
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} -o {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                '-o', self.file_out[0]])
 
 
 def configure(conf):
@@ -205,11 +205,7 @@ class Task(BaseTask):
             self.bld.fatal('%s produces no output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg}'.format(
-            exe=executable,
-            arg=' '.join(self.args + self.file_in),
-        ))
+        return self.exec_argv([executable] + self.args + self.file_in)
 
 
 def configure(conf):
@@ -66,7 +66,7 @@ class Task(BaseTask):
         # Specify a configuration file
         c = cfg.get('config_file')
         if c:
-            args.append("--rcfile='%s'" % expand_resource(self.group, c))
+            args.append('--rcfile=%s' % expand_resource(self.group, c))
 
         # Set the output format. Available formats are text,
         # parseable, colorized, msvs (visual studio) and html.
@@ -74,7 +74,7 @@ class Task(BaseTask):
         # mypackage.mymodule.MyReporterClass. [current: text]
         c = cfg.get('reporter', None)
         if c:
-            args.append("--output-format='%s'" % c)
+            args.append('--output-format=%s' % c)
 
         # In error mode, checkers without error messages are
         # disabled and for others, only the ERROR messages are
@@ -122,13 +122,8 @@ class Task(BaseTask):
             kwargs['env'] = env
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        ret = self.exec_command(
-            '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ),
-            **kwargs)
+        ret = self.exec_argv([executable] + self.args + self.file_in,
+                **kwargs)
 
         real_error = False
         for clause in self.fail_clause:
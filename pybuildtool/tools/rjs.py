@@ -23,7 +23,7 @@ tool_name = __name__
 class Task(BaseTask):
 
     name = tool_name
-    prefix = []
+    workdir = None
 
     def prepare(self):
         cfg = self.conf
@@ -31,21 +31,19 @@ class Task(BaseTask):
         # Change current directory
         c = cfg.get('work_dir', None)
         if c:
-            self.prefix.append('cd %s;' \
-                % expand_resource(self.group, c))
+            self.workdir = expand_resource(self.group, c)
 
-        self.args.append('-o %s' % expand_resource(self.group,
-            cfg['config_file']))
+        self.args.extend(['-o', expand_resource(self.group,
+            cfg['config_file'])])
 
 
     def perform(self):
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{pre} {exe} {arg}'.format(
-            exe=executable,
-            pre=' '.join(self.prefix),
-            arg=' '.join(self.args),
-        ))
+        kwargs = {}
+        if self.workdir is not None:
+            kwargs['cwd'] = self.workdir
+
+        return self.exec_argv([executable] + self.args, **kwargs)
 
 
 def configure(conf):
@@ -107,13 +107,8 @@ class Task(BaseTask):
 
         executable = self.env['%s_BIN' % tool_name.upper()]
         # TODO: roslint doesn't work in python3, xrange and bytes
-        return self.exec_command(
-            'python2 {exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ),
-            **kwargs)
+        return self.exec_argv(['python2', executable] + self.args +\
+                self.file_in, **kwargs)
 
 
 def configure(conf):
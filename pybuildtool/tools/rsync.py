@@ -472,14 +472,8 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            "{exe} {arg} {in_} {out}".format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=' '.join(inputs),
-            out=self.target,
-        ),
-        **kwargs)
+        return self.exec_argv([executable] + self.args + inputs +\
+                [self.target], **kwargs)
 
 
 def configure(conf):
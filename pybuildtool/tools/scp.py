@@ -33,12 +33,12 @@ class Task(BaseTask):
         # identity file
         c = cfg.get('identity_file', None)
         if c:
-            args.append('-i %s' % expand_resource(self.group, c))
+            args.extend(['-i', expand_resource(self.group, c)])
 
         # port
         c = cfg.get('port', None)
         if c:
-            args.append('-P %s' % c)
+            args.extend(['-P', str(c)])
 
         # host
         h = cfg.get('host', None)
@@ -60,14 +60,8 @@ class Task(BaseTask):
             self.bld.fatal('%s only have one output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            "{exe} {arg} {in_} {hst}:{out}".format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-            hst=self.hoststr,
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                '%s:%s' % (self.hoststr, self.file_out[0])])
 
 
 def configure(conf):
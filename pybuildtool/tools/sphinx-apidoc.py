@@ -42,7 +42,7 @@ class Task(BaseTask):
         output_dir = expand_resource(self.group, cfg['output_dir'])
         if output_dir is None:
             self.bld.fatal(cfg['output_dir'] + ' not found.')
-        args.append('-o ' + output_dir)
+        args.extend(['-o', output_dir])
 
         project_dir = expand_resource(self.group, cfg['project_dir'])
         if project_dir is None:
@@ -67,13 +67,8 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['SPHINX_APIDOC_BIN']
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ),
-            **kwargs)
+        return self.exec_argv([executable] + self.args + self.file_in,
+                **kwargs)
 
 
 def configure(conf):
@@ -66,29 +66,29 @@ class Task(BaseTask):
             temp_dir = expand_resource(self.group, c)
             if temp_dir is None:
                 self.bld.fatal(c + ' not found.')
-            args.append('-d ' + temp_dir)
+            args.extend(['-d', temp_dir])
 
         c = cfg.get('conf_dir')
         if c:
             conf_dir = expand_resource(self.group, c)
             if conf_dir is None:
                 self.bld.fatal(c + ' not found.')
-            args.append('-c ' + conf_dir)
+            args.extend(['-c', conf_dir])
 
         c = cfg.get('builder', 'html')
-        args.append('-b ' + c)
+        args.extend(['-b', c])
 
         c = cfg.get('jobs')
         if c:
-            args.append('-j %i' % c)
+            args.extend(['-j', '%i' % c])
 
         c = cfg.get('settings', {})
         for key, value in c.items():
-            args.append('-D %s=%s' % (key, value))
+            args.extend(['-D', '%s=%s' % (key, value)])
 
         c = cfg.get('context', {})
         for key, value in c.items():
-            args.append('-A %s=%s' % (key, value))
+            args.extend(['-A', '%s=%s' % (key, value)])
 
 
     def perform(self):
@@ -100,13 +100,8 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['SPHINX_BUILD_BIN']
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ),
-            **kwargs)
+        return self.exec_argv([executable] + self.args + self.file_in,
+                **kwargs)
 
 
 def configure(conf):
@@ -127,7 +127,7 @@ class Task(BaseTask):
         # Specify a configuration file
         c = cfg.get('config_file')
         if c:
-            args.append("--config='%s'" % expand_resource(self.group, c))
+            args.append('--config=%s' % expand_resource(self.group, c))
 
         self.add_bool_args('fix', 'ignore_disables', 'disable_default_ignores',
                 'cache', 'quiet', 'color', 'no_color',
@@ -145,12 +145,7 @@ class Task(BaseTask):
             self.bld.fatal('%s produces no output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=' '.join(self.file_in),
-        ))
+        return self.exec_argv([executable] + self.args + self.file_in)
 
 
 def configure(conf):
@@ -73,18 +73,26 @@ Requirements:
 
 """
 import os
-from pybuildtool import BaseTask, expand_resource
+from pybuildtool import BaseTask, expand_resource, make_list
 
 tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     name = tool_name
     conf = {
         '_replace_patterns_': ((r'\.styl$', '.css'),)
     }
     workdir = None
 
+    def is_cacheable(self):
+        # the source map is not one of the outputs restored from the cache
+        return not (self.conf.get('sourcemap') and\
+                not self.conf.get('sourcemap_inline')) and\
+                super().is_cacheable()
+
+
     def prepare(self):
         cfg = self.conf
         self.args = ['--print']
@@ -105,6 +113,37 @@ class Task(BaseTask):
 
         self.add_str_args('sourcemap_root', 'prefix', opt_val_sep=' ')
 
+        if not any(cfg.get(x) for x in ('use', 'inline', 'sourcemap',
+                'sourcemap_inline', 'sourcemap_base', 'sourcemap_root', 'deps',
+                'resolve_url', 'resolve_url_nocheck')):
+
+            self.node_options = self.make_node_options()
+
+
+    def make_node_options(self):
+        cfg = self.conf
+        settings = {}
+        for option, setting in (('compress', 'compress'),
+                ('firebug', 'firebug'), ('line_numbers', 'linenos'),
+                ('include_css', 'include css'),
+                ('hoist_atrules', 'hoist atrules')):
+
+            if cfg.get(option):
+                settings[setting] = True
+        if cfg.get('disable_cache'):
+            settings['cache'] = False
+        if cfg.get('prefix'):
+            settings['prefix'] = cfg['prefix'].format(
+                    **self.group.get_patterns())
+
+        return {
+            'set': settings,
+            'include': [expand_resource(self.group, x) for x in\
+                    make_list(cfg.get('include'))],
+            'import': [expand_resource(self.group, x) for x in\
+                    make_list(cfg.get('import'))],
+        }
+
 
     def perform(self):
         if len(self.file_in) != 1:
@@ -119,15 +158,14 @@ class Task(BaseTask):
         if self.workdir is not None:
             kwargs['cwd'] = self.workdir
 
+        ret = self.exec_node(self.file_in[0], self.file_out[0],
+                cwd=self.workdir)
+        if ret is not None:
+            return ret
+
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} < {in_} > {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ),
-        **kwargs)
+        return self.exec_argv([executable] + self.args, stdin=self.file_in[0],
+                stdout=self.file_out[0], **kwargs)
 
 
 def configure(conf):
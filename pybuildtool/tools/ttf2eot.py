@@ -15,27 +15,20 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.ttf$', '.eot'), (r'\.otf$', '.eot'))
     }
     name = tool_name
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s only have one output' % tool_name.capitalize())
+        return self.run_batch(self.convert)
 
+
+    def convert(self, file_in, file_out):
         executable = self.env['%s_BIN' % tool_name.upper()]
-        ret = self.exec_command(
-            '{exe} {arg} < {in_} > {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ), stdout=None)
-
-        return ret
+        return self.exec_argv([executable] + self.args, stdin=file_in,
+                stdout=file_out)
 
 
 def configure(conf):
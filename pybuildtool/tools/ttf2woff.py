@@ -9,50 +9,40 @@ Requirements:
 
 """
 import re
+import shutil
 from pybuildtool import BaseTask
 
 tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.ttf$', '.woff'), (r'\.otf$', '.woff'))
     }
     name = tool_name
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s only have one output' % tool_name.capitalize())
+        return self.run_batch(self.convert)
 
+
+    def convert(self, file_in, file_out):
         executable = self.env['%s_BIN' % tool_name.upper()]
-        ret = self.exec_command(
-            '{exe} {arg} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-        ))
+        ret = self.exec_argv([executable] + self.args + [file_in])
 
         if ret == 0:
             # success exit code
-            move_executable = self.env['MV_BIN']
-            converted_file = self.file_in[0]
+            converted_file = file_in
             for (pat, rep) in self.conf['_replace_patterns_']:
                 converted_file = re.sub(pat, rep, converted_file)
-            ret = self.exec_command(
-                '{exe} {in_} {out}'.format(
-                exe=move_executable,
-                in_=converted_file,
-                out=self.file_out[0],
-            ))
+            try:
+                shutil.move(converted_file, file_out)
+            except OSError:
+                ret = 1
 
         return ret
 
 
 def configure(conf):
-    if not conf.env.MV_BIN:
-        conf.env.MV_BIN = conf.find_program('mv')[0]
-
     bin_path = conf.find_program('sfnt2woff')[0]
     conf.env['%s_BIN' % tool_name.upper()] = bin_path
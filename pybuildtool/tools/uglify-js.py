@@ -129,11 +129,17 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     name = tool_name
     conf = {
         '_replace_patterns_': ((r'\.js$', '.min.js'),),
     }
 
+    def is_cacheable(self):
+        # the source map is not one of the outputs restored from the cache
+        return not self.conf.get('source_map') and super().is_cacheable()
+
+
     def prepare(self):
         cfg = self.conf
         args = self.args
@@ -148,7 +154,7 @@ class Task(BaseTask):
                 'reserved', 'define', 'enclose', 'preamble', 'wrap')
 
         if cfg.get('in_source_map', None):
-            args.append("--in-source-map='%s'" % cfg['in_source_map'])
+            args.append('--in-source-map=%s' % cfg['in_source_map'])
 
         for config in ('mangle', 'compress', 'comments'):
             if not config in cfg:
@@ -156,10 +162,19 @@ class Task(BaseTask):
 
             c = cfg[config]
             if c:
-                args.append("--%s='%s'" % (config, c))
+                args.append('--%s=%s' % (config, c))
             else:
                 args.append('--' + config)
 
+        # the javascript API compresses and mangles unless told otherwise,
+        # only the plain switches are translated
+        if set(args) <= {'--mangle', '--compress', '--comments'}:
+            self.node_options = {
+                'compress': '--compress' in args,
+                'mangle': '--mangle' in args,
+                'output': {'comments': '--comments' in args and 'some'},
+            }
+
 
     def perform(self):
         if len(self.file_in) != 1:
@@ -175,14 +190,13 @@ class Task(BaseTask):
                 self.bld.fatal('cannot copy file to ' + self.file_out[0])
             return -1
 
+        ret = self.exec_node(self.file_in[0], self.file_out[0])
+        if ret is not None:
+            return ret
+
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} -o {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                '-o', self.file_out[0]])
 
 
 def configure(conf):
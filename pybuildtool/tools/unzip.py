@@ -36,7 +36,7 @@ class Task(BaseTask):
         elif not os.path.isdir(path):
             os.remove(path)
             os.makedirs(path)
-        self.args.append('-d ' + expand_resource(self.group, c))
+        self.args.extend(['-d', expand_resource(self.group, c)])
 
         c = self.conf.get('quiet')
         if c:
@@ -50,12 +50,7 @@ class Task(BaseTask):
             self.bld.fatal('%s does not need output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0]])
 
 
 def configure(conf):
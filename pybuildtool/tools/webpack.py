@@ -287,14 +287,8 @@ class Task(BaseTask):
             kwargs['cwd'] = self.workdir
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            "{exe} {arg} {in_} {out}".format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=' '.join(self.file_in),
-            out=' '.join(self.file_out),
-        ),
-        **kwargs)
+        return self.exec_argv([executable] + self.args + self.file_in +\
+                self.file_out, **kwargs)
 
 
 def configure(conf):
@@ -14,6 +14,7 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.woff$', '.svg'), (r'\.woff2$', '.svg'))
     }
@@ -21,8 +22,8 @@ class Task(BaseTask):
 
     def prepare(self):
         args = self.args
-        args.append('-lang ff')
-        args.append("-c 'Open($1); Generate($2)'")
+        args.extend(['-lang', 'ff'])
+        args.extend(['-c', 'Open($1); Generate($2)'])
 
 
     def perform(self):
@@ -32,13 +33,8 @@ class Task(BaseTask):
             self.bld.fatal('%s only have one output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args + [self.file_in[0],
+                self.file_out[0]])
 
 
 def configure(conf):
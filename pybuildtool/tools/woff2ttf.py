@@ -14,6 +14,8 @@ tool_name = __name__
 
 class Task(BaseTask):
 
+    batch_size = 16
+    cacheable = True
     conf = {
         '_replace_patterns_': ((r'\.woff$', '.ttf'), (r'\.woff2$', '.ttf'))
     }
@@ -21,24 +23,18 @@ class Task(BaseTask):
 
     def prepare(self):
         args = self.args
-        args.append('-lang ff')
-        args.append("-c 'Open($1); Generate($2)'")
+        args.extend(['-lang', 'ff'])
+        # converts every pair of arguments in one process
+        args.extend(['-c', 'i = 1; while (i < $argc); Open($argv[i]);'
+                ' Generate($argv[i + 1]); Close(); i += 2; endloop'])
 
 
     def perform(self):
-        if len(self.file_in) != 1:
-            self.bld.fatal('%s only need one input' % tool_name.capitalize())
-        if len(self.file_out) != 1:
-            self.bld.fatal('%s only have one output' % tool_name.capitalize())
+        pairs = self.batch_pairs()
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_} {out}'.format(
-            exe=executable,
-            arg=' '.join(self.args),
-            in_=self.file_in[0],
-            out=self.file_out[0],
-        ))
+        return self.exec_argv([executable] + self.args +\
+                [x for pair in pairs for x in pair])
 
 
 def configure(conf):
@@ -160,12 +160,7 @@ class Task(BaseTask):
             self.bld.fatal('%s produces no output' % tool_name.capitalize())
 
         executable = self.env['%s_BIN' % tool_name.upper()]
-        return self.exec_command(
-            '{exe} {arg} {in_}'.format(
-                exe=executable,
-                arg=' '.join(self.args),
-                in_=' '.join(self.file_in),
-            ))
+        return self.exec_argv([executable] + self.args + self.file_in)
 
 
 def configure(conf):